@@ -0,0 +1,82 @@
+"""
+Keep the user's decisions about name variations across executions
+
+Decisions are kept in a JSON Lines file, one decision per line, so that
+each new decision is appended to the file rather than rewriting it.
+Each line records the draft class, a name (usually as spelled in the
+actual draft), a variation of it found in a mock draft, and whether
+they are the same player.
+"""
+
+from collections import defaultdict
+import json
+import os
+
+class AliasStore():
+    """
+    Decisions about whether names describe the same player
+
+    If path is None, decisions are only kept in memory, and if
+    read_only, new decisions aren't added to the file at path
+    """
+
+    def __init__(self, path=None, read_only=False):
+        self.path = path
+        self.read_only = read_only
+        # dicts: key is a draft class, value is a dict whose key is a
+        #        name in the actual draft and whose value is a set of
+        #        names from mocks that are (or are not) the same player
+        self._matches = defaultdict(lambda: defaultdict(set))
+        self._non_matches = defaultdict(lambda: defaultdict(set))
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        decision = json.loads(line)
+                        self._remember(decision['class'], decision['name'],
+                                       decision['variation'], decision['match'])
+
+    def _remember(self, draft_class, name, variation, is_match):
+        if is_match:
+            self._matches[draft_class][name].add(variation)
+            self._non_matches[draft_class][name].discard(variation)
+        else:
+            self._non_matches[draft_class][name].add(variation)
+            self._matches[draft_class][name].discard(variation)
+
+    def confirmed_matches(self, draft_class):
+        """
+        Return a dict (that can be updated in place) whose key is a name
+        in the actual draft and whose value is a set of its variations
+        """
+        return self._matches[draft_class]
+
+    def non_matches(self, draft_class):
+        """
+        Return a dict (that can be updated in place) whose key is a name
+        in the actual draft and whose value is a set of other players
+        """
+        return self._non_matches[draft_class]
+
+    def decision(self, draft_class, name, variation):
+        """
+        Return whether two names were decided to be the same player (in
+        either order), or None if no decision was made
+        """
+        for first, second in ((name, variation), (variation, name)):
+            if second in self._matches[draft_class].get(first, ()):
+                return True
+            if second in self._non_matches[draft_class].get(first, ()):
+                return False
+        return None
+
+    def record(self, draft_class, name, variation, is_match):
+        """Remember a decision and append it to the file."""
+        self._remember(draft_class, name, variation, is_match)
+        if not self.path or self.read_only:
+            return
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'class': draft_class, 'name': name,
+                                'variation': variation, 'match': is_match},
+                               ensure_ascii=False))
+            f.write('\n')
@@ -0,0 +1,231 @@
+"""
+Time each stage of evaluating a synthetic corpus of mock drafts
+
+A corpus is generated in the same text format as the *_NBA_drafts
+files: an official draft followed by mock drafts that shuffle it a
+little, include some players who were not drafted, misspell some names,
+and date themselves in a mix of formats. The stages of evaluate() are
+then timed separately, with the questions about name variations
+answered automatically from what the generator knows to be true.
+
+For example, to time a corpus of 1000 mocks and save the results:
+py benchmark.py --mocks 1000 --output benchmark_results.json
+"""
+
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+from time import perf_counter
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import tempfile
+
+import numpy as np
+
+import calc_draft_similarities as cds
+import metrics
+import pick_errors
+
+FIRST_NAMES = ('Aaron', 'Bol', 'Cam', 'Darius', 'Eric', 'Grant', 'Isaiah', 'Jalen',
+               'Kevin', 'Luka', 'Marcus', 'Nassir', 'Obi', 'PJ', 'Romeo', 'Tyler')
+LAST_NAMES = ('Bitadze', 'Clarke', 'Doumbouya', 'Fernando', 'Garland', 'Hachimura',
+              'Johnson', 'Langford', 'Little', 'Nembhard', 'Okeke', 'Porter', 'Reddish',
+              'Samanic', 'Thybulle', 'Washington', 'White', 'Williams')
+SUFFIXES = ('', '', '', '', ' Jr.', ' III')
+
+# functions giving a header line for a datetime in each format
+DATE_FORMATS = {
+    'iso': lambda t: t.strftime('%Y-%m-%d %H:%M:%S'),
+    'word': lambda t: '{} {}, {}'.format(t.strftime('%B'), t.day, t.year),
+    'word-time': lambda t: '{} {}, {} {}:{:02} {} ET'.format(
+        t.strftime('%b'), t.day, t.year, t.hour % 12 or 12, t.minute,
+        'PM' if t.hour >= 12 else 'AM'),
+    'slash': lambda t: '{}/{}/{}'.format(t.month, t.day, t.strftime('%y')),
+    'ctime': lambda t: t.strftime('%a %b %d %H:%M:%S %Y UTC'),
+    # not one of the fast formats, so left to the heuristic parser
+    'time-first': lambda t: '{}:{:02} {}.m. ET {} {}, {}'.format(
+        t.hour % 12 or 12, t.minute, 'p' if t.hour >= 12 else 'a',
+        t.strftime('%B'), t.day, t.year),
+}
+
+def prospect_names(count, rng):
+    """Return count distinct made-up prospect names."""
+    names = []
+    seen = set()
+    while len(names) < count:
+        name = '{} {}{}'.format(rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES),
+                                rng.choice(SUFFIXES))
+        if name.replace('.', '').casefold() not in seen:
+            seen.add(name.replace('.', '').casefold())
+            names.append(name)
+    return names
+
+def misspell(name, rng):
+    """Return a slightly different spelling of a name."""
+    letters = [i for i, c in enumerate(name) if c.isalpha()]
+    i = rng.choice(letters[1:-1])
+    kind = rng.randrange(3)
+    if kind == 0:
+        return name[:i] + name[i+1:]
+    if kind == 1:
+        return name[:i] + name[i] + name[i:]
+    return name[:i] + name[i+1] + name[i] + name[i+2:]
+
+def generate_corpus(path, mocks=250, picks=(14, 30, 60), misspell_rate=0.02,
+                    date_formats=tuple(DATE_FORMATS), seed=0):
+    """
+    Write a synthetic corpus to path and return a dict whose key is a
+    misspelled name (as it will be after form_drafts()) and whose value
+    is the correctly spelled name it stands for
+    """
+    rng = random.Random(seed)
+    prospects = prospect_names(max(picks) * 2, rng)
+    actual = prospects[:max(picks)]
+    # each prospect has a couple of recurring misspellings
+    variations = {name: [misspell(name, rng) for _ in range(2)] for name in prospects}
+    truth = {}
+    draft_time = datetime(2019, 6, 20, 19)
+
+    def clean(name):
+        return name.replace('.', '').casefold()
+    real_names = {clean(name) for name in prospects}
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('NBA\n{}\n{}\n'.format(DATE_FORMATS['word-time'](draft_time), '\n'.join(actual)))
+        for k in range(mocks):
+            length = rng.choice(picks)
+            # shuffle the actual order a little, and let some of the
+            # undrafted prospects sneak in
+            keyed = [(i + rng.gauss(0, 6), name) for i, name in enumerate(prospects)]
+            order = [name for _, name in sorted(keyed)][:length]
+            lines = []
+            for name in order:
+                if rng.random() < misspell_rate:
+                    variation = rng.choice(variations[name])
+                    if clean(variation) not in real_names:
+                        truth[clean(variation)] = clean(name)
+                        name = variation
+                lines.append(name)
+            made = draft_time - timedelta(minutes=rng.randrange(60 * 24 * 60))
+            header = DATE_FORMATS[rng.choice(date_formats)](made)
+            f.write('\nMock {}\n{}\n{}\n'.format(k % 50, header, '\n'.join(lines)))
+    return truth
+
+class NullOutput():
+    """Stands in for stdout or stderr and throws away whatever is written"""
+
+    def __init__(self):
+        self.buffer = self
+        self.last = b''
+
+    def write(self, data):
+        if isinstance(data, bytes):
+            self.last = data
+        return len(data)
+
+    def flush(self):
+        pass
+
+class TruthfulInput():
+    """Stands in for stdin and answers questions about name variations"""
+
+    prompt = re.compile(r'Is (.*) the same person as (.*)\? \(y/n\)')
+
+    def __init__(self, output, truth):
+        self.output = output
+        self.truth = truth
+
+    def readline(self):
+        match = self.prompt.match(self.output.last.decode('utf-8'))
+        if match and self.truth.get(match.group(1)) == match.group(2):
+            return 'y\n'
+        return 'n\n'
+
+def time_stages(path):
+    """Return a dict of how long (in seconds) each stage takes."""
+    timings = {}
+    cds.string_to_datetime.cache_clear()
+    start = perf_counter()
+    drafts = list(cds.form_drafts([path]))
+    timings['form_drafts'] = perf_counter() - start
+
+    [(actual, mocks)] = cds.read(drafts)
+    start = perf_counter()
+    cds.standardize_prospects(actual, mocks)
+    timings['standardize_prospects'] = perf_counter() - start
+
+    start = perf_counter()
+    data = metrics.ClassData(actual.player_list, (mock.player_list for mock in mocks))
+    timings['class_data'] = perf_counter() - start
+
+    sim_measures = []
+    for name, measure in metrics.METRICS.items():
+        start = perf_counter()
+        sim_measures.append(dict(zip(mocks, measure(data))))
+        timings[name] = perf_counter() - start
+
+    start = perf_counter()
+    errors = pick_errors.PickErrors(actual, mocks)
+    errors.hit_rates()
+    errors.mean_errors()
+    errors.projections()
+    timings['pick_errors'] = perf_counter() - start
+
+    start = perf_counter()
+    cds.display_results(tuple(metrics.METRICS), sim_measures)
+    timings['display_results'] = perf_counter() - start
+    return timings
+
+def run(mocks=250, picks=(14, 30, 60), misspell_rate=0.02,
+        date_formats=tuple(DATE_FORMATS), repeat=3, seed=0):
+    """
+    Generate a corpus, time each stage repeat times, and return a dict
+    of the settings and the best time of each stage
+    """
+    output = NullOutput()
+    saved = cds.stdout, cds.stderr, cds.stdin
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'drafts')
+        truth = generate_corpus(path, mocks, picks, misspell_rate, date_formats, seed)
+        cds.stdout, cds.stderr, cds.stdin = output, output, TruthfulInput(output, truth)
+        try:
+            # display_results() also prints directly
+            with redirect_stdout(output):
+                runs = [time_stages(path) for _ in range(repeat)]
+        finally:
+            cds.stdout, cds.stderr, cds.stdin = saved
+
+    return {
+        'settings': {'mocks': mocks, 'picks': list(picks), 'misspell_rate': misspell_rate,
+                     'date_formats': list(date_formats), 'repeat': repeat, 'seed': seed},
+        'environment': {'python': platform.python_version(), 'numpy': np.__version__,
+                        'machine': platform.machine(), 'time': datetime.now().isoformat()},
+        'seconds': {stage: min(r[stage] for r in runs) for stage in runs[0]},
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Time each stage of evaluating a synthetic corpus of mock drafts')
+    parser.add_argument('--mocks', type=int, default=250, help='number of mock drafts')
+    parser.add_argument('--picks', type=int, nargs='+', default=[14, 30, 60],
+                        help="lengths from which each mock draft's length is chosen")
+    parser.add_argument('--misspell-rate', type=float, default=0.02,
+                        help='chance of each name in a mock draft being misspelled')
+    parser.add_argument('--date-formats', nargs='+', default=list(DATE_FORMATS),
+                        choices=list(DATE_FORMATS), help='formats of the date lines')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='number of times to time each stage (the best is kept)')
+    parser.add_argument('--seed', type=int, default=0, help='seed for generating the corpus')
+    parser.add_argument('--output', help='file in which to save the results as JSON')
+    args = parser.parse_args()
+
+    results = run(args.mocks, args.picks, args.misspell_rate, args.date_formats,
+                  args.repeat, args.seed)
+    for stage, seconds in results['seconds'].items():
+        print('{:<28} {:>10.4f} s'.format(stage, seconds))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
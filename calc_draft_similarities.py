@@ -9,33 +9,140 @@ accuracy of each of the mock drafts
 
 #!/usr/bin/env python3
 
+from array import array
 from collections import defaultdict
+from collections.abc import Set
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from difflib import SequenceMatcher, get_close_matches
 from enum import Enum, unique
-from sys import stdin, stdout
+from functools import lru_cache
+from sys import stderr, stdin, stdout
+import argparse
+import atexit
+import csv
 import fileinput
+import io
+import itertools
+import json
+import os
 import re
 
+from alias_store import AliasStore
+from decisions import DecisionFile
+from draft_store import DraftStore
+from duplicates import DuplicateIndex
+from instrument import INSTRUMENTS
+from name_index import NameIndex
+from score_cache import ScoreCache
+import consensus
+import corpus
+import metrics
+import pick_errors
+import prospects
 import rbo
+import significance
+import sim_matrix
+import timeline
+
+class NameRegistry():
+    """Player names interned as IDs, so each name is only stored once"""
+
+    def __init__(self):
+        # dict: key is a name, value is its ID (its index in names)
+        self.ids = {}
+        self.names = []
+
+    def intern(self, name):
+        """Return the ID of a name, giving it one if it is new."""
+        player_id = self.ids.get(name)
+        if player_id is None:
+            player_id = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return player_id
+
+class PlayerSet(Set):
+    """A read-only view of the set of names in a DraftRanking"""
+
+    def __init__(self, draft):
+        self.draft = draft
+
+    def __contains__(self, name):
+        return DraftRanking.registry.ids.get(name) in self.draft.positions
+
+    def __iter__(self):
+        names = DraftRanking.registry.names
+        return (names[i] for i in self.draft.positions)
+
+    def __len__(self):
+        return len(self.draft.positions)
 
 class DraftRanking():
     """A class describing drafts, whether actual or mock"""
 
+    # every DraftRanking keeps its picks as IDs from this registry
+    registry = NameRegistry()
+
+    __slots__ = ('org_name', 'time_of_update', 'player_ids', 'positions')
+
     def __init__(self, org_name, time_of_update, player_list):
         self.org_name = org_name
         self.time_of_update = time_of_update
-        self.player_list = player_list
-        self.player_set = set(player_list)
+        intern = DraftRanking.registry.intern
+        self.player_ids = array('i', (intern(name) for name in player_list))
+        self._index_positions()
+
+    @classmethod
+    def from_ids(cls, org_name, time_of_update, player_ids):
+        """Return a DraftRanking of IDs that are already in the registry."""
+        draft = cls.__new__(cls)
+        draft.org_name = org_name
+        draft.time_of_update = time_of_update
+        draft.player_ids = array('i', player_ids)
+        draft._index_positions()
+        return draft
+
+    def _index_positions(self):
+        # dict: key is a player ID, value is its (first) index in the draft
+        self.positions = {}
+        for index, player_id in enumerate(self.player_ids):
+            self.positions.setdefault(player_id, index)
+
+    def __reduce__(self):
+        # IDs are only meaningful in this process, so pickle the names
+        return (DraftRanking, (self.org_name, self.time_of_update, list(self.player_list)))
+
+    @property
+    def player_list(self):
+        """A read-only view of the names in the draft, in order"""
+        return corpus.NameSequence(self.player_ids, DraftRanking.registry.names)
+
+    @property
+    def player_set(self):
+        """A read-only view of the set of names in the draft"""
+        return PlayerSet(self)
 
     def correct_name(self, old_name, new_name):
         """Change a name in the player list."""
         # presumably, each name in the list is unique
-        index = self.player_list.index(old_name)
-        self.player_list[index] = new_name
-        # update the set too
-        self.player_set.remove(old_name)
-        self.player_set.add(new_name)
+        index = self.positions.pop(DraftRanking.registry.ids[old_name])
+        new_id = DraftRanking.registry.intern(new_name)
+        self.player_ids[index] = new_id
+        self.positions[new_id] = min(index, self.positions.get(new_id, index))
+
+    def remap_ids(self, id_map):
+        """
+        Replace each player ID in the draft that is a key of the dict
+        id_map by its value
+        """
+        if self.positions.keys().isdisjoint(id_map):
+            return
+        self.player_ids = array('i', (id_map.get(player_id, player_id)
+                                      for player_id in self.player_ids))
+        self._index_positions()
+
+    def draft_class(self):
+        """Return a key for the league and year of an official draft."""
+        return '{} {}'.format(self.org_name.casefold(), self.time_of_update.year)
 
     def is_official(self):
         """Return whether this DraftRanking is from an official org."""
@@ -66,6 +173,44 @@ class DraftAttr(Enum):
     TIME = 1
     PLAYER = 2
 
+# every word that string_to_ymd() takes to be a month: a month's name or
+# any part of it at least 3 letters long (found in the earliest month)
+MONTH_WORDS = {}
+for month_number, month_name in enumerate(
+        ('january', 'february', 'march', 'april', 'may', 'june', 'july',
+         'august', 'september', 'october', 'november', 'december'), 1):
+    for start in range(len(month_name)):
+        for end in range(start + 3, len(month_name) + 1):
+            MONTH_WORDS.setdefault(month_name[start:end], month_number)
+
+# patterns used by string_to_ymd() and string_to_hms()
+WORD_DATE_PATTERN = re.compile(
+    r'(?<![:\d])(\d{1,2})?(?:[a-zA-Z]{2})?\s*(?:of)?\s*([a-zA-Z]{3,})\.?\s*(?:the)?\s*'
+    r'(\d{1,2})?(?:[a-zA-Z]{2})?(?![:\d])')
+YEAR_PATTERN = re.compile(r'(?<![:\d])\d{2}(?:\d{2})?(?![:\d])')
+NUMERIC_DATE_PATTERN = re.compile(r'(\d+)[/.-](\d+)[/.-](\d+)')
+CLOCK_TIME_PATTERN = re.compile(
+    r'(\d{1,2}):(\d{2})(?::(\d{2}))?(?!\d)(?:\s*([aApP]\.?[mM]\.?))?')
+HOUR_TIME_PATTERN = re.compile(r'(\d{1,2})()()\s*([aApP]\.?[mM]\.?)')
+
+# patterns used by fast_string_to_datetime(); the time zones are ones
+# that string_to_ymd() could never mistake for a month
+FAST_ZONE = r'(?:\s*(?:Z|UTC|GMT|[ECMP][SD]?T))?'
+FAST_TIME = (r'(?:(?:\s*[,|])?\s+(?:at\s+)?(?P<hour>\d{1,2}):(?P<minute>\d{2})(?::(?P<second>\d{2}))?'
+             r'(?:\s*(?P<am_pm>[aApP]\.?[mM]\.?))?)?' + FAST_ZONE)
+FAST_MONTH = (r'(?P<month>Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sept?|Oct|Nov|Dec|January|February|March'
+              r'|April|June|July|August|September|October|November|December)\.?')
+FAST_DATETIME_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'(?P<year>\d{4})-(?P<month>\d{1,2})-(?P<day>\d{1,2})'
+    r'(?:[T ](?P<hour>\d{1,2}):(?P<minute>\d{2})(?::(?P<second>\d{2}))?(?P<am_pm>)'
+    + FAST_ZONE + r')?',
+    FAST_MONTH + r'\s+(?P<day>\d{1,2}),?\s+(?P<year>\d{4})' + FAST_TIME,
+    r'(?P<month>0?[1-9]|1[0-2])([/.-])(?P<day>\d{1,2})\2(?P<year>\d{2}|\d{4})' + FAST_TIME,
+    r'(?:Mon|Tue|Wed|Thu|Fri|Sat|Sun)\s+' + FAST_MONTH + r'\s+(?P<day>\d{1,2})'
+    r'\s+(?P<hour>\d{1,2}):(?P<minute>\d{2}):(?P<second>\d{2})(?P<am_pm>)'
+    r'\s+(?P<year>\d{4})' + FAST_ZONE,
+))
+
 def guess_true_year(last_two_digits):
     """
     If a year is written with only two digits,
@@ -116,10 +261,6 @@ def string_to_ymd(date_string, dt_string):
      Assumption for convenience:
       - if an ambiguous date could be either MM/DD/YYYY or DD/MM/YYYY, assume American format
     """
-    all_months = dict(
-        january=1, february=2, march=3, april=4, may=5, june=6, july=7,
-        august=8, september=9, october=10, november=11, december=12
-        )
     year = month = day = 0
 
     # If you try to break this, it will break.
@@ -128,20 +269,10 @@ def string_to_ymd(date_string, dt_string):
     # Also attempt to find 1- or 2-digit numbers immediately before and after
     # Also tries to account for ordinal phrases such as "5th of November" or "May the 4th"
     # but *not* if an ordinal number is written out, e.g. "first" or "thirtieth", forget that noise
-    m_pattern = (r'(?<![:\d])(\d{1,2})?(?:[a-zA-Z]{2})?\s*(?:of)?\s*([a-zA-Z]{3,})\.?\s*(?:the)?\s*'
-                 r'(\d{1,2})?(?:[a-zA-Z]{2})?(?![:\d])')
-    word_format = re.search(m_pattern, date_string)
+    word_format = WORD_DATE_PATTERN.search(date_string)
     if word_format:
-        word = word_format.group(2).casefold()
-        # see if the month was spelled out in its entirety,
-        # then check for if month was abbreviated
-        if word in all_months:
-            month = all_months[word]
-        else:
-            for month_name in all_months:
-                if word in month_name:
-                    month = all_months[month_name]
-                    break
+        # the month may be spelled out in its entirety or abbreviated
+        month = MONTH_WORDS.get(word_format.group(2).casefold(), 0)
 
         # if month was successfully found, day should be immediately
         # before or after it
@@ -151,7 +282,7 @@ def string_to_ymd(date_string, dt_string):
                        else int(word_format.group(1)))
                 # if day has also been found, only year should remain
                 year_string = date_string[:word_format.start()] + date_string[word_format.end():]
-                find_year = re.findall(r'(?<![:\d])\d{2}(?:\d{2})?(?![:\d])', year_string)
+                find_year = YEAR_PATTERN.findall(year_string)
                 # there should only be one match
                 if len(find_year) == 1:
                     year = int(find_year[0])
@@ -177,7 +308,7 @@ def string_to_ymd(date_string, dt_string):
     # this doesn't take advantage of cases where year > (28-31) and
     # month and day < (28-31), but that shouldn't be relevant unless
     # there are mock drafts from before 2000 or after 2028
-    match = re.search(r'(\d+)[/.-](\d+)[/.-](\d+)', date_string)
+    match = NUMERIC_DATE_PATTERN.search(date_string)
     if match:
         first, second, third = (int(i) for i in match.groups())
         # try to eliminate/confirm possibilities of formats MDY, DMY, YMD
@@ -205,15 +336,24 @@ def string_to_ymd(date_string, dt_string):
             if within_month(day, month, year):
                 return year, month, day
 
-    # by now, the program was unable to unambiguously find the date and
-    # will ask the user to input it manually
-    print('Could not determine date from the following line:')
-    # print(dt_string)
-    stdout.buffer.write(dt_string.encode('utf-8'))
-    print('\nPlease input date in the following format: YYYYY-MM-DD')
+    # by now, the program was unable to unambiguously find the date
+    return None
+
+def ask_for_date(dt_string):
+    """
+    Ask the user for the date described by a line, and return it
+
+    Questions go to stderr, so that they never end up among the results
+    """
     stdout.flush()
-    date = stdin.readline().rstrip('\n')
-    print()
+    stderr.flush()
+    # print(dt_string)
+    stderr.buffer.write('Could not determine date from the following line:\n{}\n'
+                        'Please input date in the following format: YYYYY-MM-DD\n'
+                        .format(dt_string).encode('utf-8'))
+    stderr.flush()
+    with INSTRUMENTS.prompt():
+        date = stdin.readline().rstrip('\n')
     year, month, day = (int(i) for i in date.split('-'))
     return year, month, day
 
@@ -232,17 +372,13 @@ def string_to_hms(dt_string):
     date_string = dt_string
 
     # If you try to break this, it will break.
-    match = re.search(
-        r'(\d{1,2}):(\d{2})(?::(\d{2}))?(?!\d)(?:\s*([aApP]\.?[mM]\.?))?',
-        dt_string)
+    match = CLOCK_TIME_PATTERN.search(dt_string)
 
     if match:
         minute = int(match.group(2))
     # trying to account for hour+am/pm without min or sec
     else:
-        match = re.search(
-            r'(\d{1,2})()()\s*([aApP]\.?[mM]\.?)',
-            dt_string)
+        match = HOUR_TIME_PATTERN.search(dt_string)
 
         minute = 0
 
@@ -272,96 +408,371 @@ def string_to_hms(dt_string):
 
     return hour, minute, second, date_string
 
-def string_to_datetime(dt_string):
-    """Given a string describing date and time, return a datetime."""
+def fast_string_to_datetime(dt_string):
+    """
+    Return a datetime for a string in one of a few common, unambiguous
+    formats, or None if the string is not in one of them.
+
+    Formats (each optionally followed by a time and a time zone):
+     - ISO 8601, e.g. "2019-06-20 19:00:00"
+     - "Month D, YYYY", e.g. "June 20, 2019 7:00 PM EST"
+     - "M/D/YY(YY)" with a month of at most 12, e.g. "6/20/19 7:00 pm"
+     - C's ctime(), e.g. "Thu Jun 20 19:00:00 2019 UTC"
+
+    Any string accepted here is given the same datetime as
+    string_to_ymd() and string_to_hms() would give it, except that
+    they cannot interpret the ctime() format at all.
+    """
+    for pattern in FAST_DATETIME_PATTERNS:
+        match = pattern.fullmatch(dt_string.strip())
+        if match:
+            break
+    else:
+        return None
+
+    fields = match.groupdict()
+    month = fields['month']
+    month = int(month) if month.isdigit() else MONTH_WORDS.get(month.casefold(), 0)
+    day = int(fields['day'])
+    year = int(fields['year'])
+    if year < 100:
+        year = guess_true_year(year)
+    hour = int(fields['hour'] or 0)
+    minute = int(fields['minute'] or 0)
+    second = int(fields['second'] or 0)
+    if fields['am_pm']:
+        am_pm = fields['am_pm'].casefold()
+        if hour == 12 and 'a' in am_pm:
+            hour = 0
+        if hour < 12 and 'p' in am_pm:
+            hour += 12
+
+    if (not 1 <= month <= 12 or not within_month(day, month, year)
+            or hour > 23 or minute > 59 or second > 59):
+        return None
+    return datetime(year, month, day, hour, minute, second)
+
+def guess_datetime(dt_string):
+    """
+    Given a string describing date and time, return a datetime, or None
+    if the user would have to be asked for the date.
+    """
+    date_time = fast_string_to_datetime(dt_string)
+    if date_time:
+        return date_time
+    INSTRUMENTS.count('heuristic date headers')
+
     # since time should be easier to figure out than date,
     # find time and then take it out of the input for finding date
     hour, minute, second, date_string = string_to_hms(dt_string)
-    year, month, day = string_to_ymd(date_string, dt_string)
+    ymd = string_to_ymd(date_string, dt_string)
+    if ymd is None:
+        return None
+    year, month, day = ymd
+    return datetime(year, month, day, hour, minute, second)
 
+@lru_cache(maxsize=4096)
+def string_to_datetime(dt_string):
+    """
+    Given a string describing date and time, return a datetime.
+
+    Results are cached, since many drafts are updated at the same time
+    (and so that the user is only asked about a given line once).
+    """
+    date_time = guess_datetime(dt_string)
+    if date_time:
+        return date_time
+    # keep the time if it could be found
+    hour, minute, second, _ = string_to_hms(dt_string)
+    year, month, day = ask_for_date(dt_string)
     return datetime(year, month, day, hour, minute, second)
 
-def form_drafts():
+def decided_datetimes(decision_file, collect=False):
     """
-    each DraftRanking is inputted as follows:
-    first line identifies the org that made the draft list
-    second line indicates the date and time the list was updated
-    each successive line contains a name, in order of draft position
-    a blank line ends the current draft list; repeat for a new list
+    Return a function that converts a date line like string_to_datetime(),
+    except that, rather than asking, it takes the date from a DecisionFile
+
+    If collect, every line whose date can't be found is also counted in
+    the DecisionFile, and one without a decided date is given the date
+    0001-01-01; otherwise such a line is an error
+    """
+    def to_datetime(dt_string):
+        date_time = guess_datetime(dt_string)
+        if date_time:
+            return date_time
+        if collect:
+            decision_file.add_date(dt_string)
+        ymd = decision_file.date(dt_string)
+        if ymd is None:
+            if not collect:
+                raise ValueError('No date was decided for the line: {} (see --collect-decisions)'
+                                 .format(dt_string))
+            ymd = 1, 1, 1
+        hour, minute, second, _ = string_to_hms(dt_string)
+        year, month, day = ymd
+        return datetime(year, month, day, hour, minute, second)
+    # every line has to be counted when collecting
+    return to_datetime if collect else lru_cache(maxsize=4096)(to_datetime)
+
+def parse_drafts(lines, to_datetime=string_to_datetime):
+    """
+    Given lines of drafts (as described in form_drafts()), yield the
+    DraftRanking constructor args of each draft as its blank line is
+    reached, and finally of whatever follows the last blank line
+
+    Date lines are converted with to_datetime
     """
     statuses = DraftRanking.attrs()
     current_status = statuses[0]
     dr_args = DraftRanking.init_args_template()
-    with fileinput.input(openhook=fileinput.hook_encoded('utf-8')) as f_i:
-        for line in f_i:
-            line = line.rstrip('\n')
-            if line:
-                # for now, the assumption is that the player list is
-                # the last of the args because its end is signified
-                # by a blank line, which also ends the args overall
-                if current_status is DraftAttr.PLAYER:
-                    # remove periods from names
-                    line = line.replace('.', '')
-                    # casefold each name so that case will not be
-                    # considered in comparisons between names
-                    dr_args[current_status.value].append(line.casefold())
-                else:
-                    if current_status is DraftAttr.TIME:
-                        # convert the string into a datetime object
-                        arg = string_to_datetime(line)
-                    else:
-                        arg = line
-
-                    # put arg in dr_args
-                    dr_args[current_status.value] = arg
-                    # go to next status
-                    current_status = statuses[current_status.value + 1]
-
-            # a blank line indicates that all args for the current
-            # DraftRanking are complete
+    for line in lines:
+        INSTRUMENTS.count('lines parsed')
+        line = line.rstrip('\n')
+        if line:
+            # for now, the assumption is that the player list is
+            # the last of the args because its end is signified
+            # by a blank line, which also ends the args overall
+            if current_status is DraftAttr.PLAYER:
+                # remove periods from names
+                line = line.replace('.', '')
+                # casefold each name so that case will not be
+                # considered in comparisons between names
+                dr_args[current_status.value].append(line.casefold())
             else:
-                yield DraftRanking(*dr_args)
-                # wipe dr_args clean for another DraftRanking
-                dr_args = DraftRanking.init_args_template()
-                # reset current_status
-                current_status = statuses[0]
+                if current_status is DraftAttr.TIME:
+                    # convert the string into a datetime object
+                    arg = to_datetime(line)
+                else:
+                    arg = line
+
+                # put arg in dr_args
+                dr_args[current_status.value] = arg
+                # go to next status
+                current_status = statuses[current_status.value + 1]
+
+        # a blank line indicates that all args for the current
+        # DraftRanking are complete
+        else:
+            yield dr_args
+            # wipe dr_args clean for another DraftRanking
+            dr_args = DraftRanking.init_args_template()
+            # reset current_status
+            current_status = statuses[0]
 
     # hacky way to create final DR in the file
-    yield DraftRanking(*dr_args)
+    yield dr_args
+
+def form_drafts(files=None, to_datetime=string_to_datetime):
+    """
+    each DraftRanking is inputted as follows:
+    first line identifies the org that made the draft list
+    second line indicates the date and time the list was updated
+    each successive line contains a name, in order of draft position
+    a blank line ends the current draft list; repeat for a new list
+
+    files are read as in fileinput (by default, the command line args),
+    and date lines are converted with to_datetime
+    """
+    with fileinput.input(files, openhook=fileinput.hook_encoded('utf-8')) as f_i:
+        for dr_args in parse_drafts(f_i, to_datetime):
+            yield DraftRanking(*dr_args)
+
+def chunk_boundaries(path, chunk_size):
+    """
+    Return the offsets at which to split the file at path into chunks
+    of about chunk_size bytes, each starting just after a blank line
+    (so that it starts with a new draft), and the size of the file
+    """
+    size = os.path.getsize(path)
+    boundaries = [0]
+    with open(path, 'rb') as f:
+        while boundaries[-1] + chunk_size < size:
+            f.seek(boundaries[-1] + chunk_size)
+            # the line sought into may be partial, so start at the next
+            f.readline()
+            for line in iter(f.readline, b''):
+                if line in (b'\n', b'\r\n'):
+                    break
+            if f.tell() >= size:
+                break
+            boundaries.append(f.tell())
+    boundaries.append(size)
+    return boundaries
+
+def parse_chunk(path, start, end, instrument=False):
+    """
+    Parse the drafts in bytes start to end of the file at path, and
+    return a list of their DraftRanking constructor args and a Counter
+    of the work done (if instrument, otherwise it is empty)
+
+    Only runs in a worker process, so it can't ask the user anything;
+    a date line that isn't in one of the formats of
+    fast_string_to_datetime() is left as a string, so that it is only
+    guessed at (and counted) once, in the main process. The args
+    after the chunk's last blank line are included (for the last chunk
+    of a file, they are its final draft).
+    """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    # read lines in the same way as fileinput does
+    lines = io.TextIOWrapper(io.BytesIO(data), encoding='utf-8')
+    if instrument and not INSTRUMENTS.enabled:
+        INSTRUMENTS.enable()
+    before = INSTRUMENTS.counters.copy()
+    all_args = list(parse_drafts(lines, lambda line: fast_string_to_datetime(line) or line))
+    return all_args, INSTRUMENTS.counters - before
+
+def parallel_form_drafts(path, workers=None, chunk_size=1 << 20,
+                         to_datetime=string_to_datetime):
+    """
+    Same as form_drafts([path], to_datetime), but the file is split into
+    chunks that are parsed in worker processes (at most workers at a time)
+
+    Date lines the workers couldn't convert quickly are then converted
+    in order with to_datetime (by default, guessing or else asking the
+    user), before any drafts are yielded
+    """
+    boundaries = chunk_boundaries(path, chunk_size)
+    starts, ends = boundaries[:-1], boundaries[1:]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunks = []
+        for chunk, counters in pool.map(parse_chunk, [path] * len(starts), starts, ends,
+                                        [INSTRUMENTS.enabled] * len(starts)):
+            chunks.append(chunk)
+            INSTRUMENTS.merge(counters)
+    # every chunk but the last ends with a blank line, after which
+    # there is nothing
+    all_args = [dr_args for chunk in chunks[:-1] for dr_args in chunk[:-1]] + chunks[-1]
+    for dr_args in all_args:
+        time = dr_args[DraftAttr.TIME.value]
+        if isinstance(time, str):
+            dr_args[DraftAttr.TIME.value] = to_datetime(time)
+    for dr_args in all_args:
+        yield DraftRanking(*dr_args)
+
+def corpus_drafts(path):
+    """
+    Retrieve DraftRankings from a compiled corpus, with the corpus's
+    player IDs swapped for IDs in DraftRanking.registry
+    """
+    drafts = corpus.load_corpus(path)
+    intern = DraftRanking.registry.intern
+    # the registry ID of each player ID in the corpus
+    registry_ids = array('i', (intern(name) for name in drafts.player_names))
+    for org_name, time_of_update, player_ids in drafts:
+        yield DraftRanking.from_ids(org_name, time_of_update,
+                                    (registry_ids[i] for i in player_ids))
+
+def load_drafts(files=None, workers=None, to_datetime=string_to_datetime):
+    """
+    Retrieve DraftRankings from each file, whether it is a text file or
+    a compiled corpus (by default, read the command line args as text)
 
-def read():
+    If workers is given, text files are parsed in that many processes,
+    and their date lines are converted with to_datetime
+    """
+    if not files:
+        yield from form_drafts(files, to_datetime)
+        return
+    for path in files:
+        if corpus.is_corpus(path):
+            yield from corpus_drafts(path)
+        elif workers:
+            yield from parallel_form_drafts(path, workers, to_datetime=to_datetime)
+        else:
+            yield from form_drafts([path], to_datetime)
+
+def read(drafts=None):
     """
     Use the input to retrieve DraftRankings on which work can be done
-    Returns DraftRankings in this format: Actual, [Mocks]
+    Returns a list with one item per draft class (league and year) in
+    this format: (Actual, [Mocks])
+
+    Each mock is put in the class of the official draft with which it
+    has the most players in common; ties (such as when it has no
+    players in common with any of them) go to the earliest official
+    draft that was not made before the mock, or else the latest one
+
+    drafts can be given (e.g. a loaded corpus) instead of reading input
     """
-    actual, mocks = None, []
-    for draft in form_drafts():
+    actuals, mocks = [], []
+    for draft in drafts if drafts is not None else form_drafts():
         if draft.is_official():
-            if actual:
-                raise Exception('This program currently only works with one league/draft class!')
-            actual = draft
+            if any(a.draft_class() == draft.draft_class() for a in actuals):
+                raise Exception('Found more than one official draft for {}!'
+                                .format(draft.draft_class()))
+            actuals.append(draft)
         else:
             mocks.append(draft)
 
-    if not actual:
+    if not actuals:
         raise Exception('No official draft found!')
     if not mocks:
         raise Exception('No mock drafts found!')
-    return actual, mocks
 
-def standardize_variations(actual, mocks):
+    actuals.sort(key=lambda a: a.time_of_update)
+    classes = [(actual, []) for actual in actuals]
+    for mock in mocks:
+        def match(index):
+            actual = classes[index][0]
+            shared = sum(1 for name in mock.player_list if name in actual.player_set)
+            made_before = mock.time_of_update <= actual.time_of_update
+            # prefer the earliest official draft made after the mock
+            return shared, made_before, -index if made_before else index
+        classes[max(range(len(classes)), key=match)][1].append(mock)
+
+    return [(actual, class_mocks) for actual, class_mocks in classes if class_mocks]
+
+def ask_same_player(name, variation):
     """
-    Use difflib's get_close_matches() to account for name variations
+    Ask the user whether two names describe the same player, and return
+    True or False, or None if the answer is neither yes nor no
+
+    Questions go to stderr, so that they never end up among the results
+    """
+    # response = input('Is {} the same person as {}? (y/n)\n'
+    #                  .format(variation, name)).casefold()
+    stdout.flush()
+    stderr.flush()
+    stderr.buffer.write('Is {} the same person as {}? (y/n)\n'
+                        .format(variation, name).encode('utf-8'))
+    stderr.flush()
+    with INSTRUMENTS.prompt():
+        response = stdin.readline().rstrip('\n').casefold()
+    if 'y' in response:
+        return True
+    if 'n' in response:
+        return False
+    return None
+
+def standardize_variations(actual, mocks, aliases=None, name_index=None, ask=ask_same_player):
+    """
+    Use an index of the names in the mocks to account for name variations
 
     Given an official draft and an iterable of mock drafts,
     look for possible instances of variations in spelling of names and
     adjust drafts so that each name is always spelled the same way
+
+    If an AliasStore is given, decisions it holds for the draft class
+    are used without asking, and new decisions are added to it
+
+    If a NameIndex is given, the mocks' names are added to it and it is
+    used instead of a new one (e.g. to standardize mocks one at a time)
+
+    Questions are asked with ask (see ask_same_player())
     """
-    # dict: key is a name in the actual draft,
-    #       value is a set of variations of that name found in mocks
-    confirmed_matches = defaultdict(set)
-    # a dict(? there may be a better way) of user-confirmed non-matches
-    non_matches = defaultdict(set)
+    mocks = list(mocks)
+    if aliases is not None:
+        draft_class = actual.draft_class()
+        confirmed_matches = aliases.confirmed_matches(draft_class)
+        non_matches = aliases.non_matches(draft_class)
+    else:
+        # dict: key is a name in the actual draft,
+        #       value is a set of variations of that name found in mocks
+        confirmed_matches = defaultdict(set)
+        # a dict(? there may be a better way) of user-confirmed non-matches
+        non_matches = defaultdict(set)
 
     # Iterate through actual draft, iterate through list of mocks, checking if name is present.
     # If not, check dict(, look for close matches, ask user, edit dict), edit mock
@@ -369,6 +780,14 @@ def standardize_variations(actual, mocks):
     #   convert the player list into a set, and then loop the actual names
     #   but I think BOTH approaches are O(m*n^3), where m = # of mocks and n = # of names
     # - i GUESS DR could have an attribute player_set initialized with the instance
+    # - rather than calling get_close_matches() on every miss, index the
+    #   names of all mocks once; close matches for each actual name are
+    #   then only scored once and each mock just filters them
+    if name_index is None:
+        name_index = NameIndex()
+    for j in mocks:
+        for name in j.player_set:
+            name_index.add(name)
     for i in actual.player_list: # Should there be a method instead of accessing attribute directly?
         for j in mocks:
             mock_names = j.player_set
@@ -380,57 +799,73 @@ def standardize_variations(actual, mocks):
                         corrected = True
                         break
                 if not corrected:
-                    for close_match in get_close_matches(i, mock_names, n=len(mock_names)):
+                    INSTRUMENTS.count('close match lookups')
+                    for close_match in name_index.close_matches(i, mock_names, n=len(mock_names)):
                         if (close_match not in non_matches[i]
                                 and close_match not in actual.player_set):
-                            # response = input('Is {} the same person as {}? (y/n)\n'
-                            #                  .format(close_match, i)).casefold()
-                            stdout.flush()
-                            stdout.buffer.write('Is {} the same person as {}? (y/n)\n'
-                                                .format(close_match, i).encode('utf-8'))
-                            stdout.flush()
-                            response = stdin.readline().rstrip('\n').casefold()
-                            if 'y' in response:
+                            is_match = ask(i, close_match)
+                            if is_match:
                                 confirmed_matches[i].add(close_match)
+                                if aliases is not None:
+                                    aliases.record(draft_class, i, close_match, True)
                                 j.correct_name(close_match, i)
                                 # This line is currently unnecessary:
                                 # corrected = True
                                 break
-                            if 'n' in response:
+                            if is_match is False:
                                 non_matches[i].add(close_match)
+                                if aliases is not None:
+                                    aliases.record(draft_class, i, close_match, False)
 
-def sequence_matcher_similarity(actual, mocks):
+def standardize_prospects(actual, mocks, aliases=None, ask=ask_same_player):
     """
-    Given an official draft and mock drafts, calculate and return the
-    similarity of each mock draft to the actual draft as measured by
-    SequenceMatcher's method ratio()
-    """
-    # Make a SequenceMatcher with the actual draft as the second seq
-    s_m = SequenceMatcher(b=actual.player_list)
+    Standardize the name of every prospect in a draft class, not only
+    the players in the actual draft, so that mocks can be compared with
+    each other as well (see prospects.py)
 
-    for mock in mocks:
-        s_m.set_seq1(mock.player_list)
-        yield mock, s_m.ratio()
+    Each ambiguous pair of names is asked about once, and then every
+    draft with a renamed player is rewritten in a single pass over its
+    player IDs
+
+    If an AliasStore is given, decisions it holds for the draft class
+    are used without asking, and new decisions are added to it
 
-def rbo_similarity(actual, mocks, p=0):
+    Questions are asked with ask (see ask_same_player())
     """
-    Given an official draft and mock drafts, calculate and return the
-    similarity of each mock draft to the actual draft as measured by
-    rank biased overlap
+    mocks = list(mocks)
+    registry = prospects.ProspectRegistry(actual, mocks)
+    INSTRUMENTS.count('candidate name pairs', registry.resolve(ask, aliases))
+    renamed = {name: canonical for name, canonical in registry.canonical_names().items()
+               if name != canonical}
+    intern = DraftRanking.registry.intern
+    id_map = {intern(name): intern(canonical) for name, canonical in renamed.items()}
+    for draft in [actual] + mocks:
+        draft.remap_ids(id_map)
+
+def standardize_classes(classes, alias_path='name_aliases.jsonl', decision_file=None):
     """
-    # if a value for p is not provided, use suggestion by RBO creators
-    # of (1 - 1/k) where k is the length of the prefix
-    if not p:
-        p = 1 - 1/len(actual.player_list)
-    for mock in mocks:
-        yield mock, rbo.score(actual.player_list, mock.player_list)
+    Standardize the names of each draft class in a list of
+    (Actual, [Mocks]), keeping decisions about name variations in the
+    file at alias_path (if it is not None)
+
+    If a DecisionFile is given, questions are answered from it rather
+    than by the user (and those it leaves undecided are skipped)
+    """
+    aliases = AliasStore(alias_path) if alias_path else None
+    for actual, mocks in classes:
+        ask = (ask_same_player if decision_file is None
+               else decision_file.answers(actual.draft_class()))
+        standardize_prospects(actual, mocks, aliases, ask)
 
-def display_results(measure_names, sim_measures):
+def display_results(measure_names, sim_measures, draft_classes=None):
     """
     Extremely rough code for displaying the orgs and their similarity scores in a table
 
     Able to accomodate for any number of rank similarity measures (as
     long the output window is wide enough to display all their names)
+
+    If a dict of each mock's draft class is given, the class is shown
+    in a column before the org name
     """
     # for each measure, record the measure's name as it will be shown
     # in the table and the name's length or 7, whichever is greater
@@ -442,6 +877,9 @@ def display_results(measure_names, sim_measures):
     # column lengths, and the number of pipes (used as column dividers)
     # in each line
     line_length = offset + sum(i[1] for i in col_lengths) + 2 + len(col_lengths)
+    if draft_classes:
+        class_length = max(max(len(c) for c in draft_classes.values()), len('Class'))
+        line_length += class_length + 1
 
     print()
     print('-' * line_length)
@@ -450,6 +888,8 @@ def display_results(measure_names, sim_measures):
     #       *(('{:^{}}').format(i[0], i[1]) for i in col_lengths),
     #       sep='|', end='|\n')
     header = [['Organization', offset]] + col_lengths
+    if draft_classes:
+        header.insert(0, ['Class', class_length])
     org_names = b'|'.join(('{:^{}}').format(i[0], i[1]).encode('utf-8') for i in header)
     stdout.flush()
     stdout.buffer.write(b''.join((b'|', org_names, b'|\n')))
@@ -461,69 +901,563 @@ def display_results(measure_names, sim_measures):
         #       *(('{:>{}.3%}').format(m[draft], c_l[1]) for m, c_l in zip(sim_measures, col_lengths)),
         #       sep='|', end='|\n')
         draft_name = ('|{:<{}}').format(draft.org_name, offset).encode('utf-8')
+        if draft_classes:
+            draft_name = ('|{:<{}}').format(draft_classes[draft], class_length).encode('utf-8') + draft_name
         sim_scores = (('{:>{}.3%}').format(m[draft], c_l[1]).encode('utf-8') for c_l, m in zip(col_lengths, sim_measures))
         stdout.flush()
         stdout.buffer.write(b'|'.join((draft_name, *sim_scores, b'\n')))
     print('-' * line_length)
 
-def evaluate():
+def consensus_draft(actual, mocks, method='borda'):
+    """
+    Return a DraftRanking of the consensus of the mocks (as of the
+    latest one) by a method in consensus.METHODS, as long as the actual
+    """
+    order = consensus.Consensus(mock.player_list for mock in mocks).order(
+        method, len(actual.player_list))
+    return DraftRanking('Consensus ({})'.format(method),
+                        max(mock.time_of_update for mock in mocks), order)
+
+def significance_rows(classes, scores, resamples, kind='random', window=5, seed=0,
+                      workers=None, measure_names=('SequenceMatcher', 'RBO score')):
+    """
+    Given a list of (Actual, [Drafts]) for each draft class and a dict
+    whose key is the name of a measure and whose value is a dict of
+    each draft's score, compare each score to those of resampled
+    rankings (see significance.py) of the draft's length
+
+    Returns a tuple of names (a percentile and a p-value per measure)
+    and a tuple of dicts of each draft's values, as display_results()
+    takes them
+    """
+    nulls = significance.null_distributions(
+        [(actual.player_list, [len(draft.player_list) for draft in drafts])
+         for actual, drafts in classes],
+        resamples, kind, window, seed, measure_names, workers)
+    sig_names, sig_measures = [], []
+    for name in measure_names:
+        percentiles, p_values = {}, {}
+        for (_, drafts), by_length in zip(classes, nulls):
+            for draft in drafts:
+                null = by_length[len(draft.player_list)][name]
+                percentiles[draft] = significance.percentile(scores[name][draft], null)
+                p_values[draft] = significance.p_value(scores[name][draft], null)
+        sig_names += ['{} percentile'.format(name), '{} p-value'.format(name)]
+        sig_measures += [percentiles, p_values]
+    INSTRUMENTS.count('resampled rankings scored', resamples * sum(map(len, nulls)))
+    return tuple(sig_names), tuple(sig_measures)
+
+def score_classes(classes, workers=None, cache=None):
+    """
+    Given a list of (Actual, [Mocks]) for each draft class, return a
+    list of dicts (one per class) whose key is the name of a measure in
+    metrics.METRICS and whose value is a list of each mock's score
+
+    Classes are scored in worker processes if there is more than one.
+    If a ScoreCache is given, only the mocks whose scores it doesn't
+    have are scored, and their scores are added to it
+    """
+    measure_names = list(metrics.METRICS)
+    results, jobs = [], []
+    for actual, mocks in classes:
+        actual_names = list(actual.player_list)
+        mock_names = [list(mock.player_list) for mock in mocks]
+        scores = {name: [None] * len(mocks) for name in measure_names}
+        if cache:
+            keys = [{name: cache.key(actual_names, names, name) for name in measure_names}
+                    for names in mock_names]
+            for k, mock_keys in enumerate(keys):
+                for name in measure_names:
+                    scores[name][k] = cache.get(mock_keys[name])
+        missing = [k for k in range(len(mocks))
+                   if any(scores[name][k] is None for name in measure_names)]
+        INSTRUMENTS.count('score cache hits', len(mocks) - len(missing))
+        results.append(scores)
+        if missing:
+            jobs.append((len(results) - 1, missing, actual_names,
+                         [mock_names[k] for k in missing], keys if cache else None))
+
+    args = [(actual_names, mock_names) for _, _, actual_names, mock_names, _ in jobs]
+    if len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            scored = list(pool.map(metrics.score_all, *zip(*args)))
+    else:
+        scored = [metrics.score_all(*a) for a in args]
+
+    for (index, missing, _, _, keys), new_scores in zip(jobs, scored):
+        scores = results[index]
+        for name in measure_names:
+            for k, score in zip(missing, new_scores[name]):
+                scores[name][k] = score
+                if cache:
+                    cache.put(keys[k][name], score)
+            INSTRUMENTS.count('{} evaluations'.format(name), len(missing))
+    if cache:
+        cache.save()
+    return results
+
+def evaluate(alias_path='name_aliases.jsonl', drafts=None, workers=None, matrix_path=None,
+             cache_path=None, cache_size=100000, store_path=None, consensus_method=None,
+             resamples=0, null_kind='random', window=5, seed=0, decision_file=None):
     """
     Given the actual draft order and various mock drafts,
     output measures of how close each mock was to the actual
-    """
-    # get the actual draft and a list of mock drafts
-    actual, mocks = read()
 
-    # try to adjust names in the mock drafts to have the same spelling
-    # as in the actual draft
-    standardize_variations(actual, mocks)
+    Decisions about name variations are kept in the file at alias_path
+    (if it is not None) so they only have to be made once
+
+    drafts can be given (e.g. a loaded corpus) instead of reading input
+
+    If there is more than one draft class, each class is scored in its
+    own worker process (at most workers at a time; by default, as many
+    as there are CPUs)
 
-    # have to think about how to design the code to make adding
-    # additional similarity measures a clean process and also how to
-    # display all the info in an easy-to-read way
-    # ratios = dict((i.org_name, j) for i, j in sequence_matcher_similarity(actual, mocks))
-    # rbo_scores = dict((i.org_name, j) for i, j in rbo_similarity(actual, mocks))
-    ratios = dict(sequence_matcher_similarity(actual, mocks))
-    rbo_scores = dict(rbo_similarity(actual, mocks))
+    If matrix_path is given, the similarity of every pair of mocks is
+    also computed (in parallel, in the same way) and saved there
 
-    # kinda feels like these two variables should be linked together or
-    # something, but it also seems unnecessary to do so
-    measure_names = ('SequenceMatcher', 'RBO score')
-    sim_measures = (ratios, rbo_scores)
+    If cache_path is given, scores are kept in a ScoreCache there (of
+    at most cache_size scores), so that mocks that haven't changed
+    since a previous execution don't have to be scored again
+
+    If store_path is given, the drafts (after their names have been
+    standardized) and their scores are added to a DraftStore there
+
+    If consensus_method (one of consensus.METHODS) is given, a consensus
+    of each class's mocks is scored too and shown before them as a
+    baseline
+
+    If resamples is given, that many rankings are made from each actual
+    draft by null_kind (one of significance.KINDS, with the given window
+    and seed) and scored, and how each mock compares to them is shown
+
+    If a DecisionFile is given, name variations are decided by it
+    rather than by asking
+    """
+    # get the actual draft and a list of mock drafts for each class
+    with INSTRUMENTS.stage('read'):
+        classes = read(drafts)
+
+    # try to adjust names in all drafts so each player is always spelled
+    # the same way; this asks the user questions, so it has to be done
+    # here rather than in the workers
+    with INSTRUMENTS.stage('standardize_prospects'):
+        standardize_classes(classes, alias_path, decision_file)
+
+    with INSTRUMENTS.stage('score'):
+        cache = ScoreCache(cache_path, cache_size) if cache_path else None
+        results = score_classes(classes, workers, cache)
+
+    if store_path:
+        with INSTRUMENTS.stage('store'):
+            store = DraftStore(store_path)
+            store.add_classes(classes)
+            store.save_scores(classes, results)
+            store.close()
+
+    # every measure registered in metrics.METRICS is shown, so adding a
+    # measure only takes registering it there
+    measure_names = tuple(metrics.METRICS)
+    sim_measures = tuple({} for _ in measure_names)
+    draft_classes = {}
+    # the drafts shown for each class, including any baseline
+    shown = []
+    for (actual, mocks), scores in zip(classes, results):
+        shown.append((actual, []))
+        if consensus_method:
+            with INSTRUMENTS.stage('consensus'):
+                baseline = consensus_draft(actual, mocks, consensus_method)
+                baseline_scores = metrics.score_all(actual.player_list, [baseline.player_list])
+            for name, measure in zip(measure_names, sim_measures):
+                measure[baseline] = baseline_scores[name][0]
+            shown[-1][1].append(baseline)
+        for name, measure in zip(measure_names, sim_measures):
+            measure.update(zip(mocks, scores[name]))
+        shown[-1][1].extend(mocks)
+        draft_classes.update((draft, actual.draft_class()) for draft in shown[-1][1])
 
     # probably wanna have display_results include a 'time of update'
     # column so multiple mocks from same org can be compared
-    display_results(measure_names, sim_measures)
+    with INSTRUMENTS.stage('display_results'):
+        display_results(measure_names, sim_measures,
+                        draft_classes if len(classes) > 1 else None)
+
+    if resamples:
+        with INSTRUMENTS.stage('significance'):
+            sig_names, sig_measures = significance_rows(
+                shown, dict(zip(measure_names, sim_measures)), resamples,
+                null_kind, window, seed, workers)
+        with INSTRUMENTS.stage('display_results'):
+            print('\nCompared to {} rankings made from the actual draft by {} resampling:'
+                  .format(resamples, null_kind))
+            display_results(sig_names, sig_measures,
+                            draft_classes if len(classes) > 1 else None)
+
+    if matrix_path:
+        with INSTRUMENTS.stage('similarity_matrix'):
+            all_mocks = [mock for _, mocks in classes for mock in mocks]
+            sim_matrix.save_matrices(matrix_path, all_mocks,
+                                     *sim_matrix.similarity_matrices(all_mocks, workers=workers))
+        INSTRUMENTS.count('SequenceMatcher evaluations', len(all_mocks) ** 2)
+        INSTRUMENTS.count('RBO score evaluations', len(all_mocks) ** 2)
+
+def show_top_mocks(k, alias_path='name_aliases.jsonl', drafts=None, decision_file=None):
+    """
+    Output the k mock drafts of each draft class that are closest to
+    the actual draft by RBO score
+    """
+    classes = read(drafts)
+    standardize_classes(classes, alias_path, decision_file)
+    for actual, mocks in classes:
+        scores = rbo.score_many(actual.player_list, (mock.player_list for mock in mocks))
+        # best first, ties going to the earlier mock
+        order = sorted(range(len(scores)), key=lambda index: (-scores[index], index))
+        top = [(index, scores[index]) for index in order[:k]]
+        print('Top {} of {} mock drafts for {}:'.format(len(top), len(mocks), actual.draft_class()))
+        for place, (index, score) in enumerate(top, 1):
+            stdout.buffer.write('{:>4}. {:<50} {:^19} {:>9.3%}\n'.format(
+                place, mocks[index].org_name, str(mocks[index].time_of_update),
+                score).encode('utf-8'))
+        stdout.flush()
+
+def show_timelines(alias_path='name_aliases.jsonl', drafts=None, org_name=None,
+                   decision_file=None):
+    """
+    Output, for each org with more than one mock in a draft class (or
+    just the given org), how the accuracy of its mocks changed over
+    time and how much each version drifted from the one before it
+    """
+    classes = read(drafts)
+    standardize_classes(classes, alias_path, decision_file)
+    columns = ['Time of update'] + list(timeline.ACCURACY_MEASURES) + [
+        '{} drift'.format(name) for name in timeline.ACCURACY_MEASURES]
+    widths = [19] + [max(len(name), 9) for name in columns[1:]]
+    for actual, mocks in classes:
+        if org_name is not None:
+            mocks = [mock for mock in mocks if mock.org_name == org_name]
+        for org, rows in timeline.timelines(actual, mocks).items():
+            if org_name is None and len(rows) < 2:
+                continue
+            stdout.flush()
+            stdout.buffer.write('\n{} | {} | {} versions\n'.format(
+                actual.draft_class(), org, len(rows)).encode('utf-8'))
+            stdout.buffer.write(('|' + ''.join('{:^{}}|'.format(name, width)
+                                               for name, width in zip(columns, widths))
+                                 + '\n').encode('utf-8'))
+            for mock, accuracy, version_drift in rows:
+                cells = ['{:^19}'.format(str(mock.time_of_update))]
+                cells += ['{:>{}.3%}'.format(accuracy[name], width)
+                          for name, width in zip(timeline.ACCURACY_MEASURES, widths[1:])]
+                drift_widths = widths[1 + len(timeline.ACCURACY_MEASURES):]
+                cells += (['{:>{}}'.format('-', width) for width in drift_widths]
+                          if version_drift is None else
+                          ['{:>{}.3%}'.format(value, width)
+                           for value, width in zip(version_drift, drift_widths)])
+                stdout.buffer.write(('|' + '|'.join(cells) + '|\n').encode('utf-8'))
+    stdout.flush()
+
+def show_pick_errors(alias_path='name_aliases.jsonl', drafts=None, matrix_path=None,
+                     decision_file=None):
+    """
+    Output, for each pick of each draft class, how many mocks had the
+    right player there, how far off the mocks were for that player, and
+    the range of picks the player was projected at
+
+    If matrix_path is given, the position of each player in each mock
+    is saved there (see pick_errors.PickErrors.save()); with more than
+    one draft class, the class is added to the name of each file
+    """
+    classes = read(drafts)
+    standardize_classes(classes, alias_path, decision_file)
+    for actual, mocks in classes:
+        errors = pick_errors.PickErrors(actual, mocks)
+        if matrix_path:
+            if len(classes) > 1:
+                root, ext = os.path.splitext(matrix_path)
+                errors.save('{}_{}{}'.format(root, actual.draft_class().replace(' ', '_'), ext))
+            else:
+                errors.save(matrix_path)
+
+        appearances, earliest, latest, average = errors.projections()
+        name_width = max([len(name) for name in errors.players] + [6])
+        print('Picks of {} by {} mock drafts:'.format(actual.draft_class(), len(mocks)))
+        stdout.flush()
+        stdout.buffer.write('|{:^4}|{:<{}}|{:^9}|{:^10}|{:^7}|{:^8}|{:^6}|{:^7}|\n'.format(
+            'Pick', 'Player', name_width, 'Hit rate', 'Mean error', 'Mocks', 'Earliest',
+            'Latest', 'Average').encode('utf-8'))
+        for pick, (name, hit_rate, error, count, first, last, mean) in enumerate(zip(
+                errors.players, errors.hit_rates(), errors.mean_errors(), appearances,
+                earliest, latest, average), 1):
+            projected = (['{:>8}'.format(first + 1), '{:>6}'.format(last + 1),
+                          '{:>7.1f}'.format(mean + 1)] if count else
+                         ['{:>8}'.format('-'), '{:>6}'.format('-'), '{:>7}'.format('-')])
+            stdout.buffer.write(('|{:>4}|{:<{}}|{:>9.1%}|{:>10.2f}|{:>7}|'.format(
+                pick, name, name_width, hit_rate, error, count)
+                                 + '|'.join(projected) + '|\n').encode('utf-8'))
+        stdout.flush()
+
+def collect_decisions(decision_path, files=None, workers=None,
+                      alias_path='name_aliases.jsonl'):
+    """
+    Parse the drafts and standardize their names without asking anything,
+    and write every date line and pair of names that would have been
+    asked about to a DecisionFile at decision_path (keeping any decisions
+    it already has), and return the DecisionFile
+
+    Decisions about name variations already kept in the file at
+    alias_path (if it is not None) aren't asked about, and decisions
+    from the DecisionFile are only added to it once they are applied
+    """
+    decision_file = DecisionFile(decision_path)
+    decision_file.clear_counts()
+    classes = read(load_drafts(files, workers, decided_datetimes(decision_file, collect=True)))
+    aliases = AliasStore(alias_path, read_only=True) if alias_path else None
+    for actual, mocks in classes:
+        registry = prospects.ProspectRegistry(actual, mocks)
+        def collect(name, variation, registry=registry):
+            decision_file.add_name(registry.draft_class, name, variation,
+                                   registry.counts[variation])
+            return decision_file.same_player(registry.draft_class, name, variation)
+        registry.resolve(collect, aliases)
+    decision_file.save()
+    return decision_file
+
+def find_actual(files, to_datetime=string_to_datetime):
+    """
+    Quickly look through files for the first official draft and return
+    it, without reading any further
+    """
+    for draft in load_drafts(files, to_datetime=to_datetime):
+        if draft.is_official():
+            return draft
+    raise Exception('No official draft found!')
+
+def stream_evaluate(drafts, actual=None, alias_path='name_aliases.jsonl',
+                    output_format='csv', out=None, decision_file=None):
+    """
+    Score each mock draft and write out its scores as soon as it is
+    read, without keeping it around afterwards
+
+    If the official draft is not given, it must come before any mocks.
+    Rows are written to out (by default, stdout) as CSV, JSON Lines, or
+    a table with columns of fixed widths
 
-def check_draft_lengths(expected):
+    If a DecisionFile is given, name variations are decided by it
+    rather than by asking
+    """
+    out = out or stdout
+    aliases = AliasStore(alias_path)
+    name_index = NameIndex()
+    measure_names = tuple(metrics.METRICS)
+    widths = [max(len(name), 9) for name in measure_names]
+    if output_format == 'csv':
+        writer = csv.writer(out, lineterminator='\n')
+        writer.writerow(('Organization', 'Time of update') + measure_names)
+    elif output_format == 'table':
+        out.write('|{:<50}|{:^19}|'.format('Organization', 'Time of update')
+                  + ''.join('{:^{}}|'.format(name, width)
+                            for name, width in zip(measure_names, widths)) + '\n')
+
+    def standardized_mocks():
+        """Yield each mock draft after standardizing its names."""
+        nonlocal actual
+        for draft in drafts:
+            if draft.is_official():
+                if actual is None:
+                    actual = draft
+                elif draft.draft_class() != actual.draft_class():
+                    raise Exception('Streaming only works with one league/draft class!')
+                continue
+            if actual is None:
+                raise Exception('The official draft must come before any mock drafts!')
+            standardize_variations(actual, [draft], aliases, name_index,
+                                   ask_same_player if decision_file is None
+                                   else decision_file.answers(actual.draft_class()))
+            yield draft
+
+    mocks = standardized_mocks()
+    # the official draft is only known once the first mock is read
+    first = next(mocks, None)
+    if first is None:
+        raise Exception('No mock drafts found!')
+    actual_names = list(actual.player_list)
+    for mock in itertools.chain([first], mocks):
+        scores = metrics.score_all(actual_names, [mock.player_list])
+        scores = [scores[name][0] for name in measure_names]
+        if output_format == 'csv':
+            writer.writerow([mock.org_name, mock.time_of_update] + scores)
+        elif output_format == 'jsonl':
+            row = {'org_name': mock.org_name, 'time_of_update': mock.time_of_update.isoformat()}
+            row.update(zip(measure_names, scores))
+            out.write(json.dumps(row, ensure_ascii=False) + '\n')
+        else:
+            out.write('|{:<50}|{:^19}|'.format(mock.org_name, str(mock.time_of_update))
+                      + ''.join('{:>{}.3%}|'.format(score, width)
+                                for score, width in zip(scores, widths)) + '\n')
+        out.flush()
+
+def check_draft_lengths(expected, drafts=None):
     """
     Check to see if any DraftRankings are of unexpected lengths
     """
-    mocks = list(form_drafts())
+    mocks = list(drafts if drafts is not None else form_drafts())
 
     for m in mocks:
         l = len(m.player_list)
         if l not in expected:
             print('{}\'s draft made on {} has {} names'.format(m.org_name, m.time_of_update, l))
 
-def check_for_duplicates():
+def check_for_duplicates(drafts=None, threshold=0.9):
     """
     Check to see if any two DraftRankings have the same players in the
     same order. Could be used to help weed out duplicate mock drafts
     that were inserted by accident.
 
-    Note #1: one may want to have a list of all prospects across all
-    mock drafts so that all names can be standardized rather than only
-    the prospects who are actually drafted. I may write a function to
-    create such a list.
+    Also lists pairs that are not exact duplicates but whose players
+    and their positions (mostly near the top) are estimated to be at
+    least threshold similar, e.g. a mock that was reposted with a few
+    changes.
+
+    Note #1: names are compared as they are spelled in the input; see
+    standardize_prospects() for standardizing every prospect's name
+    rather than only those of the prospects who are actually drafted.
 
     Note #2: IMO it makes sense to only compare names up to the length
     of the shorter list. It's possible that two mock drafts are
     duplicates but were gathered in different ways and one was
     incomplete, for example.
     """
+    index = DuplicateIndex(draft for draft in (drafts if drafts is not None else form_drafts())
+                           if not draft.is_official())
+
+    def describe(i):
+        draft = index.drafts[i]
+        return '{}\'s draft made on {}'.format(draft.org_name, draft.time_of_update)
+
+    exact = index.exact_duplicates()
+    for i, j, length in exact:
+        print('{} and {} are the same through the first {} names'
+              .format(describe(i), describe(j), length))
+    exact_pairs = set((i, j) for i, j, _ in exact)
+    for i, j, similarity in index.near_duplicates(threshold):
+        if (i, j) not in exact_pairs:
+            print('{} and {} are about {:.0%} similar'
+                  .format(describe(i), describe(j), similarity))
 
 if __name__ == "__main__":
-    # evaluate()
-    # common NBA mock draft lengths: 14 (lottery), 30 (first round), and 60 (both rounds)
-    check_draft_lengths({14, 30, 60})
+    parser = argparse.ArgumentParser(
+        description='Evaluate how close mock drafts were to the actual draft')
+    parser.add_argument('files', nargs='*',
+                        help='text files of drafts or compiled corpora (default: stdin)')
+    parser.add_argument('--aliases', default='name_aliases.jsonl',
+                        help='file in which to keep decisions about name variations')
+    parser.add_argument('--workers', type=int,
+                        help='number of processes for scoring draft classes')
+    parser.add_argument('--parse-workers', type=int, metavar='N',
+                        help='parse each text file in N processes (not with --stream)')
+    parser.add_argument('--similarity-matrix', metavar='PATH',
+                        help='also save the similarity of every pair of mocks to a .npz file')
+    parser.add_argument('--score-cache', metavar='PATH',
+                        help='file in which to keep scores so unchanged mocks are not scored again')
+    parser.add_argument('--score-cache-size', type=int, default=100000,
+                        help='number of scores to keep in the score cache')
+    parser.add_argument('--store', metavar='PATH',
+                        help='SQLite database to add drafts and scores to (and, without files, to read drafts from)')
+    parser.add_argument('--consensus', choices=consensus.METHODS,
+                        help="also score a consensus of each class's mocks as a baseline")
+    parser.add_argument('--resamples', type=int, default=0, metavar='N',
+                        help='also compare each mock to N rankings resampled from the actual draft')
+    parser.add_argument('--null', choices=significance.KINDS, default='random',
+                        help='how to resample: at random, or by shuffling picks within a window')
+    parser.add_argument('--window', type=int, default=5,
+                        help='with --null window, the most spots a pick can be moved')
+    parser.add_argument('--seed', type=int, default=0, help='seed for resampling')
+    parser.add_argument('--stream', choices=('csv', 'jsonl', 'table'),
+                        help='score each mock as it is read and write its row in this format')
+    parser.add_argument('--actual', metavar='FILE',
+                        help='with --stream, file with the official draft (default: the first in the input)')
+    parser.add_argument('--output', metavar='PATH',
+                        help='with --stream, file to write rows to (default: stdout)')
+    parser.add_argument('--timeline', action='store_true',
+                        help="only show how each org's mocks changed over time")
+    parser.add_argument('--org', help='with --timeline, only show this org')
+    parser.add_argument('--pick-errors', action='store_true',
+                        help='only show how often each pick was mocked right, and where '
+                             'each drafted player was projected')
+    parser.add_argument('--error-matrix', metavar='PATH',
+                        help="with --pick-errors, save each player's position in each mock "
+                             'to a .npy (or else CSV) file')
+    parser.add_argument('--top', type=int, metavar='K',
+                        help='only list the K mocks of each class with the highest RBO scores')
+    parser.add_argument('--collect-decisions', metavar='PATH',
+                        help='only parse and match names without asking anything, and write '
+                             'the dates and name pairs that need deciding to PATH')
+    parser.add_argument('--decisions', metavar='PATH',
+                        help='take dates and name variations from a decision file instead of asking')
+    parser.add_argument('--instrument', metavar='PATH',
+                        help='save how long each stage took (and counts of work done) as JSON')
+    parser.add_argument('--profile', metavar='DIR',
+                        help='with --instrument, also save a cProfile profile of each stage')
+    parser.add_argument('--check-lengths', action='store_true',
+                        help='only list drafts of unusual lengths')
+    parser.add_argument('--check-duplicates', action='store_true',
+                        help='only list mock drafts that duplicate each other')
+    args = parser.parse_args()
+    if args.profile and not args.instrument:
+        parser.error('--profile only works with --instrument')
+
+    if args.instrument:
+        INSTRUMENTS.enable(args.profile)
+        # dump the summary even if the program is stopped partway
+        atexit.register(INSTRUMENTS.dump, args.instrument)
+
+    decisions = DecisionFile(args.decisions) if args.decisions else None
+    if decisions is None and not args.files and not args.store and not args.collect_decisions:
+        # the drafts come from stdin, so it can't be used to answer
+        # questions: undecided name variations are skipped, and a date
+        # that can't be found is an error
+        decisions = DecisionFile()
+        stderr.write('Reading drafts from standard input, so nothing will be asked; '
+                     'use --collect-decisions and --decisions to decide name variations\n')
+    to_datetime = decided_datetimes(decisions) if decisions else string_to_datetime
+    if args.store and not args.files:
+        store = DraftStore(args.store)
+        input_drafts = [DraftRanking(*dr_args) for dr_args in store.drafts()]
+        store.close()
+    else:
+        input_drafts = load_drafts(args.files, args.parse_workers, to_datetime)
+
+    if args.collect_decisions:
+        collected = collect_decisions(args.collect_decisions, args.files, args.parse_workers,
+                                      args.aliases)
+        print('{} decisions to make in {}'.format(collected.pending(), args.collect_decisions))
+    elif args.check_lengths:
+        # common NBA mock draft lengths: 14 (lottery), 30 (first round), and 60 (both rounds)
+        check_draft_lengths({14, 30, 60}, input_drafts)
+    elif args.check_duplicates:
+        check_for_duplicates(input_drafts)
+    elif args.timeline:
+        show_timelines(args.aliases, input_drafts, args.org, decisions)
+    elif args.pick_errors:
+        show_pick_errors(args.aliases, input_drafts, args.error_matrix, decisions)
+    elif args.top:
+        show_top_mocks(args.top, args.aliases, input_drafts, decisions)
+    elif args.stream:
+        # with files, the official draft can be found in a quick first
+        # pass; from stdin, it has to come first
+        if args.actual:
+            actual_draft = find_actual([args.actual], to_datetime)
+        elif args.files:
+            actual_draft = find_actual(args.files, to_datetime)
+        else:
+            actual_draft = None
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8', newline='') as out_file:
+                stream_evaluate(load_drafts(args.files, to_datetime=to_datetime), actual_draft,
+                                args.aliases, args.stream, out_file, decisions)
+        else:
+            stream_evaluate(load_drafts(args.files, to_datetime=to_datetime), actual_draft,
+                            args.aliases, args.stream, decision_file=decisions)
+    else:
+        evaluate(args.aliases, input_drafts, args.workers, args.similarity_matrix,
+                 args.score_cache, args.score_cache_size, args.store, args.consensus,
+                 args.resamples, args.null, args.window, args.seed, decisions)
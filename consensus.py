@@ -0,0 +1,116 @@
+"""
+Build a consensus draft out of many mock drafts
+
+A matrix of the rank of every player (in any mock) in every mock is
+made once, and the consensus orders are reductions over it:
+ - borda: by average rank, where a mock without a player counts them
+   as picked just after its last pick
+ - median: by median rank, counted the same way
+ - appearance: by how many mocks have a player (then by average rank)
+ - kemeny: starting from the Borda order, players are moved one at a
+   time to wherever agrees with the most mocks' pairwise preferences,
+   until no move helps (a local search for the Kemeny ranking)
+"""
+
+import numpy as np
+
+METHODS = ('borda', 'median', 'appearance', 'kemeny')
+
+class Consensus():
+    """The ranks of every player in a set of mock drafts"""
+
+    def __init__(self, mocks):
+        mocks = [list(names) for names in mocks]
+        # dict: key is a name, value is its row (in order of first appearance)
+        self.rows = {}
+        rows, cols, ranks = [], [], []
+        for col, names in enumerate(mocks):
+            for rank, name in enumerate(names):
+                rows.append(self.rows.setdefault(name, len(self.rows)))
+                cols.append(col)
+                ranks.append(rank)
+        self.players = list(self.rows)
+        self.lengths = np.array([len(names) for names in mocks], dtype=float)
+        self.ranks = np.full((len(self.players), len(mocks)), np.inf)
+        # if a mock has a player more than once, keep the first
+        np.minimum.at(self.ranks, (rows, cols), ranks)
+        self.ranks[np.isinf(self.ranks)] = np.nan
+        self.present = ~np.isnan(self.ranks)
+        # players missing from a mock count as picked just after its end
+        self.filled = np.where(self.present, self.ranks, self.lengths)
+        self._preferences = None
+
+    def appearance_rate(self):
+        """Return the fraction of mocks that have each player."""
+        return self.present.mean(axis=1)
+
+    def average_rank(self):
+        """Return each player's average (0-based) rank."""
+        return self.filled.mean(axis=1)
+
+    def median_rank(self):
+        """Return each player's median (0-based) rank."""
+        return np.median(self.filled, axis=1)
+
+    def preferences(self, chunk_size=64):
+        """
+        Return a matrix whose [i, j] is the number of mocks that rank
+        player i ahead of player j (a player in a mock is ahead of every
+        player not in it; two players not in a mock aren't compared)
+        """
+        if self._preferences is None:
+            n_players, n_mocks = self.filled.shape
+            self._preferences = np.zeros((n_players, n_players))
+            for start in range(0, n_mocks, chunk_size):
+                filled = self.filled[:, start:start + chunk_size].T
+                self._preferences += np.sum(filled[:, :, None] < filled[:, None, :], axis=0)
+        return self._preferences
+
+    def kemeny(self, order=None, max_passes=100):
+        """
+        Improve an order of player rows (by default, the Borda order)
+        by moving one player at a time to the spot that agrees most
+        with preferences(), until no move helps, and return it
+        """
+        if order is None:
+            order = self.order_rows('borda')
+        order = list(order)
+        preferences = self.preferences()
+        for _ in range(max_passes):
+            improved = False
+            for player in list(order):
+                i = order.index(player)
+                # net number of mocks agreeing with putting player
+                # ahead of (rather than behind) each other player
+                margin = preferences[player, order] - preferences[order, player]
+                # gain from moving player to each earlier or later spot
+                gains = np.zeros(len(order))
+                gains[:i] = np.cumsum(margin[:i][::-1])[::-1]
+                gains[i+1:] = np.cumsum(-margin[i+1:])
+                j = int(np.argmax(gains))
+                if gains[j] > 0:
+                    order.insert(j, order.pop(i))
+                    improved = True
+            if not improved:
+                break
+        return order
+
+    def order_rows(self, method='borda'):
+        """Return the player rows in consensus order by a method in METHODS."""
+        first_seen = np.arange(len(self.players))
+        if method == 'borda':
+            keys = (first_seen, self.average_rank())
+        elif method == 'median':
+            keys = (first_seen, self.average_rank(), self.median_rank())
+        elif method == 'appearance':
+            keys = (first_seen, self.average_rank(), -self.appearance_rate())
+        elif method == 'kemeny':
+            return self.kemeny()
+        else:
+            raise ValueError('Unknown consensus method: {}'.format(method))
+        # the last key is sorted on first, and ties go to the next
+        return list(np.lexsort(keys))
+
+    def order(self, method='borda', length=None):
+        """Return the names of the consensus draft (of at most length picks)."""
+        return [self.players[row] for row in self.order_rows(method)[:length]]
@@ -0,0 +1,174 @@
+"""
+Compile drafts into a compact binary corpus and load it without parsing
+
+A corpus file holds, in this order:
+ - a header: magic bytes, format version, and the number of player
+   names, organization names, drafts, and picks
+ - the player name table and the organization name table, each as an
+   array of offsets into a blob of UTF-8 encoded names
+ - one entry per draft: its organization's ID, whether it is official,
+   and its time of update in seconds since the epoch
+ - the offset of each draft's first pick, then every pick as a player ID
+
+Names are stored after the same processing as in form_drafts(), so a
+loaded corpus can be evaluated right away. Loading memory-maps the file,
+so only the name tables are decoded, and each draft's picks are read
+straight out of it as player IDs without parsing any text.
+
+To compile one or more text files of drafts:
+py corpus.py 2019_NBA_drafts 2019_NBA_drafts.corpus
+"""
+
+from array import array
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+import calendar
+import mmap
+import struct
+import sys
+
+MAGIC = b'MDEC'
+VERSION = 1
+HEADER = struct.Struct('<4sIIIII')
+EPOCH = datetime(1970, 1, 1)
+
+def is_corpus(path):
+    """Return whether the file at path is a compiled corpus."""
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+def pad(size):
+    """Return the number of bytes needed to align size to 8 bytes."""
+    return -size % 8
+
+def name_table(names):
+    """Return the offsets array and the blob of a table of names."""
+    blob = bytearray()
+    offsets = array('I', [0])
+    for name in names:
+        blob += name.encode('utf-8')
+        offsets.append(len(blob))
+    return offsets, bytes(blob)
+
+def compile_corpus(drafts, path):
+    """Write DraftRankings to path as a binary corpus."""
+    player_ids, org_ids = {}, {}
+    org_of, flags, times = array('i'), array('i'), array('q')
+    pick_offsets, picks = array('I', [0]), array('i')
+    for draft in drafts:
+        org_of.append(org_ids.setdefault(draft.org_name, len(org_ids)))
+        flags.append(1 if draft.is_official() else 0)
+        times.append(calendar.timegm(draft.time_of_update.timetuple()))
+        picks.extend(player_ids.setdefault(name, len(player_ids))
+                     for name in draft.player_list)
+        pick_offsets.append(len(picks))
+
+    with open(path, 'wb') as f:
+        header = HEADER.pack(MAGIC, VERSION, len(player_ids), len(org_ids),
+                             len(times), len(picks))
+        f.write(header + bytes(pad(len(header))))
+        for names in (player_ids, org_ids):
+            offsets, blob = name_table(names)
+            f.write(offsets.tobytes() + bytes(pad(len(offsets) * offsets.itemsize)))
+            f.write(blob + bytes(pad(len(blob))))
+        for column in (times, org_of, flags, pick_offsets, picks):
+            f.write(column.tobytes() + bytes(pad(len(column) * column.itemsize)))
+
+class NameSequence(Sequence):
+    """A read-only sequence of names given by an array of IDs"""
+
+    def __init__(self, ids, names):
+        self.ids = ids
+        self.names = names
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.names[i] for i in self.ids[index]]
+        return self.names[self.ids[index]]
+
+    # compared like lists, e.g. when rbo.score() sorts its arguments
+    def __eq__(self, other):
+        if isinstance(other, (list, NameSequence)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __lt__(self, other):
+        if isinstance(other, (list, NameSequence)):
+            return list(self) < list(other)
+        return NotImplemented
+
+    def __gt__(self, other):
+        if isinstance(other, (list, NameSequence)):
+            return list(self) > list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+class Corpus(Sequence):
+    """
+    A memory-mapped corpus whose items are tuples of the org name, time
+    of update, and player IDs (indices of player_names) of each draft
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self.mmap)
+        magic, version, n_players, n_orgs, n_drafts, n_picks = HEADER.unpack_from(view)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('{} is not a version {} corpus'.format(path, VERSION))
+        if sys.byteorder != 'little':
+            raise ValueError('Corpora can only be loaded on little-endian machines')
+        position = HEADER.size + pad(HEADER.size)
+
+        def take(count, fmt):
+            """Return the next count items as a view of the given format."""
+            nonlocal position
+            size = count * struct.calcsize(fmt)
+            section = view[position:position + size]
+            position += size + pad(size)
+            return section.cast(fmt) if fmt != 'B' else section
+
+        tables = []
+        for count in (n_players, n_orgs):
+            offsets = take(count + 1, 'I')
+            blob = take(offsets[-1], 'B')
+            tables.append([str(blob[offsets[i]:offsets[i + 1]], 'utf-8')
+                           for i in range(count)])
+        self.player_names, self.org_names = tables
+        self.times = take(n_drafts, 'q')
+        self.org_of = take(n_drafts, 'i')
+        self.flags = take(n_drafts, 'i')
+        self.pick_offsets = take(n_drafts + 1, 'I')
+        self.picks = take(n_picks, 'i')
+
+    def __len__(self):
+        return len(self.times)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('corpus index out of range')
+        start, end = self.pick_offsets[index], self.pick_offsets[index + 1]
+        return (self.org_names[self.org_of[index]],
+                EPOCH + timedelta(seconds=self.times[index]), self.picks[start:end])
+
+def load_corpus(path):
+    """Memory-map the corpus at path and return it as a Corpus."""
+    return Corpus(path)
+
+def compile_files(files, path):
+    """Write the drafts in each of the text files to path as a corpus."""
+    from calc_draft_similarities import load_drafts
+    # each file is read on its own, since a file's last draft need not
+    # end with a blank line
+    compile_corpus(load_drafts(files), path)
+
+if __name__ == "__main__":
+    compile_files(sys.argv[1:-1], sys.argv[-1])
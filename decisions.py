@@ -0,0 +1,108 @@
+"""
+Resolve ambiguous dates and names in two phases instead of asking
+
+In phase one, the drafts are parsed and their names standardized
+without stopping, and every date line and pair of names that would have
+been asked about is written to a decision file, once each, most
+frequent first. Once the decisions in it are filled in, phase two
+applies the file without asking anything.
+
+The file is in JSON Lines, one decision per line. A date line, with
+the number of drafts that have it, looks like
+{"kind": "date", "line": "sometime in June", "count": 3, "date": null}
+and is answered by setting "date" to "YYYY-MM-DD". A pair of names,
+with the number of drafts that have the variation, looks like
+{"kind": "name", "class": "nba 2019", "name": "...", "variation": "...",
+ "count": 5, "match": null}
+and is answered by setting "match" to true or false. Running phase one
+again with the file keeps its answers and lists whatever is left, e.g.
+name pairs in a class whose official draft had an undecided date.
+"""
+
+import json
+import os
+
+class DecisionFile():
+    """Date lines and pairs of names to be decided, and their answers"""
+
+    def __init__(self, path=None):
+        self.path = path
+        # dicts: key is a date line, or a tuple of (draft class, name,
+        #        variation); value is its decision as kept in the file
+        self.dates = {}
+        self.names = {}
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        decision = json.loads(line)
+                        if decision['kind'] == 'date':
+                            self.dates[decision['line']] = decision
+                        else:
+                            self.names[decision['class'], decision['name'],
+                                       decision['variation']] = decision
+
+    def date(self, line):
+        """Return the (year, month, day) decided for a date line, or None."""
+        decision = self.dates.get(line)
+        if decision is None or not decision['date']:
+            return None
+        year, month, day = (int(i) for i in decision['date'].split('-'))
+        return year, month, day
+
+    def add_date(self, line):
+        """Count a date line that couldn't be converted."""
+        decision = self.dates.setdefault(line, {'kind': 'date', 'line': line,
+                                                'count': 0, 'date': None})
+        decision['count'] += 1
+
+    def add_name(self, draft_class, name, variation, count):
+        """Add a pair of names to be decided, found in count drafts."""
+        key = (draft_class, name, variation)
+        if key not in self.names and (draft_class, variation, name) in self.names:
+            key = (draft_class, variation, name)
+        decision = self.names.setdefault(key, {
+            'kind': 'name', 'class': draft_class, 'name': name, 'variation': variation,
+            'count': 0, 'match': None})
+        decision['count'] = count
+
+    def same_player(self, draft_class, name, variation):
+        """
+        Return whether two names (in either order) were decided to be the
+        same player, or None if no decision was made
+        """
+        decision = (self.names.get((draft_class, name, variation))
+                    or self.names.get((draft_class, variation, name)))
+        return decision['match'] if decision else None
+
+    def answers(self, draft_class):
+        """
+        Return a function that answers questions about names in a draft
+        class like ask_same_player() does, but from the decisions
+        """
+        return lambda name, variation: self.same_player(draft_class, name, variation)
+
+    def clear_counts(self):
+        """Forget the counts of every decision (before they are found again)."""
+        for decision in list(self.dates.values()) + list(self.names.values()):
+            decision['count'] = 0
+
+    def pending(self):
+        """Return the number of decisions found that haven't been made."""
+        return (sum(1 for d in self.dates.values() if d['count'] and not d['date'])
+                + sum(1 for d in self.names.values() if d['count'] and d['match'] is None))
+
+    def save(self):
+        """
+        Write every decision that was made or found, dates first, each
+        kind sorted by how many drafts it affects
+        """
+        dates = sorted((d for d in self.dates.values() if d['count'] or d['date']),
+                       key=lambda d: (-d['count'], d['line']))
+        names = sorted((d for d in self.names.values()
+                        if d['count'] or d['match'] is not None),
+                       key=lambda d: (-d['count'], d['class'], d['name'], d['variation']))
+        with open(self.path, 'w', encoding='utf-8') as f:
+            for decision in dates + names:
+                f.write(json.dumps(decision, ensure_ascii=False))
+                f.write('\n')
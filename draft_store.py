@@ -0,0 +1,221 @@
+"""
+Keep drafts and their similarity scores in a SQLite database
+
+Each draft is stored once, identified by its organization, time of
+update and a hash of its picks (an org can post more than one mock at
+the same time), along with the draft class it was evaluated in, and its
+picks are stored one row per pick. Scores are stored per draft and measure.
+Indexes on (class, org, time) and (player, pick) let questions like
+"every mock by an org over time" or "where was a player projected in
+every mock" be answered without reading through every draft.
+
+Drafts are stored as they are evaluated, after their names have been
+standardized, and the hash that identifies one is of those names. So
+if a mock's names are standardized differently later (e.g. after a
+decision about a name changes), adding it again adds it as a new draft
+with the new spellings rather than finding the old one; make the
+database again from the text files after changing decisions.
+
+To add the drafts in text files (or corpora) to a database:
+py draft_store.py drafts.db 2019_NBA_drafts
+"""
+
+from datetime import datetime
+from itertools import groupby
+import hashlib
+import sqlite3
+import sys
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS orgs (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS players (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS drafts (
+    id INTEGER PRIMARY KEY,
+    org_id INTEGER NOT NULL REFERENCES orgs (id),
+    time_of_update TEXT NOT NULL,
+    picks_hash TEXT NOT NULL,
+    draft_class TEXT,
+    official INTEGER NOT NULL,
+    UNIQUE (org_id, time_of_update, picks_hash)
+);
+CREATE TABLE IF NOT EXISTS picks (
+    draft_id INTEGER NOT NULL REFERENCES drafts (id),
+    pick INTEGER NOT NULL,
+    player_id INTEGER NOT NULL REFERENCES players (id),
+    PRIMARY KEY (draft_id, pick)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS scores (
+    draft_id INTEGER NOT NULL REFERENCES drafts (id),
+    measure TEXT NOT NULL,
+    score REAL NOT NULL,
+    PRIMARY KEY (draft_id, measure)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS drafts_by_class ON drafts (draft_class, org_id, time_of_update);
+CREATE INDEX IF NOT EXISTS picks_by_player ON picks (player_id, pick);
+'''
+
+# number of drafts inserted per transaction
+BATCH_SIZE = 1000
+
+def picks_hash(draft):
+    """Return a hash of the picks of a draft, in order (as currently spelled)."""
+    return hashlib.sha1('\n'.join(draft.player_list).encode('utf-8')).hexdigest()
+
+class DraftStore():
+    """A SQLite database of drafts and their scores"""
+
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+        # dicts: key is a table ('orgs' or 'players'), value is a dict
+        #        whose key is a name and whose value is its ID
+        self._ids = {'orgs': {}, 'players': {}}
+        # dict: key is a draft added or found by add_drafts(), value is
+        #       the ID of its row
+        self._draft_ids = {}
+
+    def close(self):
+        """Close the database."""
+        self.connection.close()
+
+    def _id(self, table, name):
+        """Return the ID of a name in orgs or players, adding it if need be."""
+        ids = self._ids[table]
+        if name not in ids:
+            self.connection.execute(
+                'INSERT OR IGNORE INTO {} (name) VALUES (?)'.format(table), (name,))
+            ids[name] = self.connection.execute(
+                'SELECT id FROM {} WHERE name = ?'.format(table), (name,)).fetchone()[0]
+        return ids[name]
+
+    def _draft_id(self, draft):
+        """Return the ID of a stored draft, or None if it isn't stored."""
+        if draft not in self._draft_ids:
+            row = self.connection.execute(
+                'SELECT id FROM drafts WHERE org_id = ? AND time_of_update = ? AND picks_hash = ?',
+                (self._id('orgs', draft.org_name), draft.time_of_update.isoformat(' '),
+                 picks_hash(draft))).fetchone()
+            if not row:
+                return None
+            self._draft_ids[draft] = row[0]
+        return self._draft_ids[draft]
+
+    def add_drafts(self, drafts, draft_class=None):
+        """
+        Add drafts (in batches) that aren't already stored, and return
+        how many were added
+
+        The ID of each draft's row is kept, so that its scores can be
+        saved without looking for it again
+        """
+        added = 0
+        drafts = iter(drafts)
+        while True:
+            batch = [draft for _, draft in zip(range(BATCH_SIZE), drafts)]
+            if not batch:
+                return added
+            with self.connection:
+                for draft in batch:
+                    cursor = self.connection.execute(
+                        'INSERT OR IGNORE INTO drafts'
+                        ' (org_id, time_of_update, picks_hash, draft_class, official)'
+                        ' VALUES (?, ?, ?, ?, ?)',
+                        (self._id('orgs', draft.org_name), draft.time_of_update.isoformat(' '),
+                         picks_hash(draft),
+                         draft_class or (draft.draft_class() if draft.is_official() else None),
+                         int(draft.is_official())))
+                    if not cursor.rowcount:
+                        # already stored (the same picks, by the same org at the same time)
+                        self._draft_id(draft)
+                        continue
+                    self._draft_ids[draft] = cursor.lastrowid
+                    added += 1
+                    self.connection.executemany(
+                        'INSERT INTO picks (draft_id, pick, player_id) VALUES (?, ?, ?)',
+                        ((cursor.lastrowid, pick, self._id('players', name))
+                         for pick, name in enumerate(draft.player_list, 1)))
+
+    def add_classes(self, classes):
+        """
+        Add the drafts in a list of (Actual, [Mocks]) for each draft
+        class, and set the class of each one already stored
+        """
+        for actual, mocks in classes:
+            self.add_drafts([actual] + mocks, actual.draft_class())
+            with self.connection:
+                self.connection.executemany(
+                    'UPDATE drafts SET draft_class = ? WHERE id = ?',
+                    ((actual.draft_class(), self._draft_id(draft)) for draft in mocks))
+
+    def save_scores(self, classes, results):
+        """
+        Given a list of (Actual, [Mocks]) for each draft class (already
+        stored) and the scores from score_classes(), store the scores
+        """
+        with self.connection:
+            for (_, mocks), scores in zip(classes, results):
+                draft_ids = [self._draft_id(mock) for mock in mocks]
+                for measure, measure_scores in scores.items():
+                    self.connection.executemany(
+                        'INSERT OR REPLACE INTO scores (draft_id, measure, score) VALUES (?, ?, ?)',
+                        zip(draft_ids, [measure] * len(mocks), measure_scores))
+
+    def drafts(self, draft_class=None):
+        """
+        Yield the DraftRanking constructor args (org name, time of
+        update, and list of names) of the stored drafts (of one draft
+        class, if given), in the order they were added
+        """
+        condition = 'WHERE d.draft_class = ?' if draft_class else ''
+        params = (draft_class,) if draft_class else ()
+        headers = self.connection.execute(
+            'SELECT d.id, o.name, d.time_of_update FROM drafts d JOIN orgs o ON o.id = d.org_id '
+            '{} ORDER BY d.id'.format(condition), params)
+        picks = self.connection.execute(
+            'SELECT k.draft_id, p.name FROM picks k JOIN drafts d ON d.id = k.draft_id '
+            'JOIN players p ON p.id = k.player_id {} ORDER BY k.draft_id, k.pick'
+            .format(condition), params)
+        draft_picks = groupby(picks, key=lambda row: row[0])
+        current_id, names = next(draft_picks, (None, ()))
+        for draft_id, org_name, time_of_update in headers:
+            player_list = []
+            if draft_id == current_id:
+                player_list = [name for _, name in names]
+                current_id, names = next(draft_picks, (None, ()))
+            yield org_name, datetime.fromisoformat(time_of_update), player_list
+
+    def mocks_by_org(self, org_name, draft_class=None):
+        """
+        Return a list of (draft class, time of update, measure, score)
+        for every score of every mock by an org, oldest first
+        """
+        condition = 'AND d.draft_class = ?' if draft_class else ''
+        params = (org_name, draft_class) if draft_class else (org_name,)
+        return self.connection.execute(
+            'SELECT d.draft_class, d.time_of_update, s.measure, s.score FROM drafts d '
+            'JOIN orgs o ON o.id = d.org_id LEFT JOIN scores s ON s.draft_id = d.id '
+            'WHERE o.name = ? AND NOT d.official {} ORDER BY d.time_of_update, s.measure'
+            .format(condition), params).fetchall()
+
+    def projections(self, player_name):
+        """
+        Return a list of (draft class, org, time of update, pick) for
+        every draft that has a player, with the official drafts first
+        """
+        return self.connection.execute(
+            'SELECT d.draft_class, o.name, d.time_of_update, k.pick FROM players p '
+            'JOIN picks k ON k.player_id = p.id JOIN drafts d ON d.id = k.draft_id '
+            'JOIN orgs o ON o.id = d.org_id WHERE p.name = ? '
+            'ORDER BY d.official DESC, d.time_of_update', (player_name,)).fetchall()
+
+if __name__ == "__main__":
+    from calc_draft_similarities import load_drafts
+    store = DraftStore(sys.argv[1])
+    print('Added {} drafts'.format(store.add_drafts(load_drafts(sys.argv[2:]))))
+    store.close()
@@ -0,0 +1,133 @@
+"""
+Find mock drafts that duplicate each other without comparing every pair
+
+Exact duplicates: two drafts are duplicates if they have the same
+players in the same order up to the length of the shorter one. A
+rolling hash of every prefix of every draft is looked up among the
+hashes of whole drafts, so each draft that is a prefix of another is
+found in time linear in the total number of picks.
+
+Near duplicates: each draft is turned into a set of shingles, one for
+each player and the group of picks the player was projected in, with copies
+for players projected near the top so that the top of a draft counts
+for more. MinHash signatures of the shingle sets are split into bands,
+and only drafts that share a band (locality-sensitive hashing) are
+compared, by the fraction of their signatures that agree.
+"""
+
+from collections import defaultdict
+from itertools import combinations
+import zlib
+
+import numpy as np
+
+# rolling hash of prefixes: Mersenne prime modulus and an arbitrary base
+MODULUS = (1 << 61) - 1
+BASE = 1000003
+# numbers of picks per shingle group, and of MinHash bands and rows
+GROUP_SIZE = 5
+BANDS = 16
+ROWS = 4
+
+class DuplicateIndex():
+    """An index of drafts for finding exact and near duplicates"""
+
+    def __init__(self, drafts=(), seed=0):
+        self.drafts = []
+        self.player_ids = {}
+        self.sequences = []
+        # dict: key is the hash of a whole draft, value is a list of
+        #       indices of drafts with that hash
+        self.full_hashes = defaultdict(list)
+        self.prefix_hashes = []
+        self.signatures = []
+        # random hash functions (a*x + b) % MODULUS for MinHash; a is
+        # small enough that a*x cannot overflow for 32-bit shingles
+        rng = np.random.RandomState(seed)
+        self.hash_a = rng.randint(1, 1 << 29, size=BANDS * ROWS, dtype=np.int64).astype(np.uint64)
+        self.hash_b = rng.randint(0, MODULUS, size=BANDS * ROWS, dtype=np.int64).astype(np.uint64)
+        for draft in drafts:
+            self.add(draft)
+
+    def add(self, draft):
+        """Add a DraftRanking to the index."""
+        index = len(self.drafts)
+        self.drafts.append(draft)
+        sequence = [self.player_ids.setdefault(name, len(self.player_ids))
+                    for name in draft.player_list]
+        self.sequences.append(sequence)
+
+        prefix_hashes = []
+        running = 0
+        for player_id in sequence:
+            running = (running * BASE + player_id + 1) % MODULUS
+            prefix_hashes.append(running)
+        self.prefix_hashes.append(prefix_hashes)
+        if sequence:
+            self.full_hashes[running].append(index)
+
+        self.signatures.append(self.signature(self.shingles(sequence)))
+
+    @staticmethod
+    def shingles(sequence):
+        """
+        Return the shingles of a draft as an array of 32-bit hashes
+
+        A player in group g (counting from 0) of a draft with n groups
+        gives n - g shingles, so the top group carries the most weight
+        """
+        n_groups = -(-len(sequence) // GROUP_SIZE)
+        hashes = []
+        for position, player_id in enumerate(sequence):
+            group = position // GROUP_SIZE
+            for copy in range(n_groups - group):
+                hashes.append(zlib.crc32('{} {} {}'.format(player_id, group, copy).encode()))
+        return np.array(hashes, dtype=np.uint64)
+
+    def signature(self, shingles):
+        """Return the MinHash signature of an array of shingles."""
+        if not len(shingles):
+            return None
+        hashed = (np.outer(self.hash_a, shingles) + self.hash_b[:, None]) % np.uint64(MODULUS)
+        return hashed.min(axis=1)
+
+    def exact_duplicates(self):
+        """
+        Return a list of (i, j, length) for each pair of drafts with the
+        same players in the same order through the first length picks,
+        where length is the length of the shorter draft
+        """
+        found = set()
+        for j, prefix_hashes in enumerate(self.prefix_hashes):
+            for length, prefix_hash in enumerate(prefix_hashes, 1):
+                for i in self.full_hashes.get(prefix_hash, ()):
+                    pair = (min(i, j), max(i, j))
+                    if (i != j and pair not in found
+                            and len(self.sequences[i]) == length
+                            and self.sequences[i] == self.sequences[j][:length]):
+                        found.add(pair)
+        return sorted((i, j, min(len(self.sequences[i]), len(self.sequences[j])))
+                      for i, j in found)
+
+    def near_duplicates(self, threshold=0.9):
+        """
+        Return a list of (i, j, similarity) for each pair of drafts
+        whose estimated weighted Jaccard similarity is at least threshold
+        """
+        buckets = defaultdict(list)
+        for index, signature in enumerate(self.signatures):
+            if signature is not None:
+                for band in range(BANDS):
+                    key = (band, signature[band*ROWS:(band+1)*ROWS].tobytes())
+                    buckets[key].append(index)
+
+        candidates = set()
+        for indices in buckets.values():
+            candidates.update(combinations(indices, 2))
+
+        results = []
+        for i, j in sorted(candidates):
+            similarity = float(np.mean(self.signatures[i] == self.signatures[j]))
+            if similarity >= threshold:
+                results.append((i, j, similarity))
+        return results
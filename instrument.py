@@ -0,0 +1,115 @@
+"""
+Optional instrumentation of where the time goes in an evaluation
+
+When enabled, INSTRUMENTS records:
+ - how long each stage takes, and how much of that was spent waiting
+   for the user to answer a question
+ - counters of work done (lines parsed, questions asked, etc.)
+ - optionally, a cProfile profile of each stage, saved as a .prof file
+   (a stage that runs more than once, e.g. once per draft class, is
+   profiled into the same file)
+
+Everything is a no-op until enable() is called, so the counters can be
+left in place in the code being measured.
+
+Only this process is timed and profiled. Counters from worker
+processes are only included where the worker sends them back to be
+merged (as the parsing workers do); work done in the workers that
+score classes, resample rankings, or compute the similarity matrix is
+counted here in the parent, but its time only shows up as the time the
+parent spent waiting for them.
+"""
+
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from time import perf_counter
+import cProfile
+import json
+import os
+
+class Instruments():
+    """Stage timers, counters, and profiles for one execution"""
+
+    def __init__(self):
+        self.enabled = False
+        self.profile_dir = None
+        self.counters = Counter()
+        # dicts: key is a stage name, value is a number of seconds
+        self.stage_seconds = defaultdict(float)
+        self.prompt_seconds = defaultdict(float)
+        # dict: key is a stage name, value is its cProfile.Profile
+        self.profilers = {}
+        self.current_stage = None
+
+    def enable(self, profile_dir=None):
+        """Start recording, and profiling each stage if given a directory."""
+        self.enabled = True
+        self.profile_dir = profile_dir
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+
+    def count(self, name, amount=1):
+        """Add to a counter."""
+        if self.enabled:
+            self.counters[name] += amount
+
+    def merge(self, counters):
+        """Add counters sent back from another process."""
+        if self.enabled:
+            self.counters.update(counters)
+
+    @contextmanager
+    def stage(self, name):
+        """Time (and maybe profile) the code run within this context."""
+        if not self.enabled or self.current_stage is not None:
+            # stages are not nested; an inner stage is part of the outer
+            yield
+            return
+        profiler = None
+        if self.profile_dir:
+            profiler = self.profilers.setdefault(name, cProfile.Profile())
+        self.current_stage = name
+        start = perf_counter()
+        if profiler:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler:
+                profiler.disable()
+            self.stage_seconds[name] += perf_counter() - start
+            self.current_stage = None
+
+    @contextmanager
+    def prompt(self):
+        """Time the code within this context as waiting for the user."""
+        if not self.enabled:
+            yield
+            return
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.counters['prompts issued'] += 1
+            self.prompt_seconds[self.current_stage or 'other'] += perf_counter() - start
+
+    def summary(self):
+        """Return everything recorded as a dict."""
+        stages = {}
+        for name in set(self.stage_seconds) | set(self.prompt_seconds):
+            seconds = self.stage_seconds.get(name, 0.0)
+            waiting = self.prompt_seconds.get(name, 0.0)
+            stages[name] = {'seconds': seconds, 'prompt_seconds': waiting,
+                            'compute_seconds': max(seconds - waiting, 0.0)}
+        return {'stages': stages, 'counters': dict(self.counters),
+                'prompt_seconds': sum(self.prompt_seconds.values())}
+
+    def dump(self, path):
+        """Write the summary to path as JSON, and each stage's profile."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=2, sort_keys=True)
+        for name, profiler in self.profilers.items():
+            profiler.dump_stats(os.path.join(self.profile_dir, name + '.prof'))
+
+# the instruments used by the rest of the program
+INSTRUMENTS = Instruments()
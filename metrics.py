@@ -0,0 +1,144 @@
+"""
+Similarity measures between an official draft and its mock drafts
+
+Each measure is a function registered with @metric under the name shown
+for it in the results. Rather than working from the drafts themselves,
+every measure is given a ClassData, which is made once per draft class
+and holds what the measures have in common:
+ - the rank of each name in the actual draft
+ - a matrix of the rank in the actual draft of each mock's picks
+ - the position in each mock of each player in the actual draft
+ - the overlap of each mock and the actual draft at every depth
+
+so that adding a measure usually only takes a few array operations.
+Every measure gives a similarity, where higher is closer to the actual.
+"""
+
+import numpy as np
+
+import rbo
+import seq_match
+
+# dict: key is a measure's name as shown in the results, value is a
+#       function that takes a ClassData and returns each mock's score
+METRICS = {}
+
+def metric(name):
+    """Register the decorated function as a similarity measure."""
+    def register(function):
+        METRICS[name] = function
+        return function
+    return register
+
+class ClassData():
+    """What the similarity measures need to know about a draft class"""
+
+    def __init__(self, actual_names, mock_names):
+        self.actual_names = list(actual_names)
+        self.mock_names = [list(names) for names in mock_names]
+        self.ref_len = len(self.actual_names)
+        # dict: key is a name, value is its (first) rank in the actual draft
+        self.rank_of = {}
+        for rank, name in enumerate(self.actual_names):
+            self.rank_of.setdefault(name, rank)
+        self.distinct = len(self.rank_of) == self.ref_len
+        self.ranks, self.lengths = rbo.rank_matrix(self.actual_names, self.mock_names)
+        self.width = self.ranks.shape[1]
+        self.found = self.ranks >= 0
+        # if a player isn't in a mock, a spot just past the end of the
+        # longer of the two drafts stands in for their position
+        self.missing_at = np.maximum(self.lengths, self.ref_len)
+        # position in each mock of each player in the actual draft
+        # (where they first appear), or -1
+        self.positions = np.full((len(self.mock_names), self.ref_len), self.width, dtype=np.intp)
+        rows, cols = np.nonzero(self.found)
+        np.minimum.at(self.positions, (rows, self.ranks[rows, cols]), cols)
+        self.positions[self.positions == self.width] = -1
+        self.overlap = rbo.overlap_table(self.ranks)
+
+def score_all(actual_names, mock_names, names=None):
+    """
+    Given the player lists of an official draft and its mock drafts,
+    return a dict whose key is a measure's name and whose value is a
+    list of each mock's score (by default, for every measure)
+    """
+    data = ClassData(actual_names, mock_names)
+    return {name: [float(score) for score in METRICS[name](data)]
+            for name in (names or METRICS)}
+
+@metric('SequenceMatcher')
+def sequence_matcher(data):
+    """The ratio() of difflib's SequenceMatcher"""
+    if data.distinct:
+        # an actual draft's ranks are IDs in order, so a mock's row of
+        # the rank matrix is already the position of each of its picks
+        s_m = seq_match.RatioMatcher(range(data.ref_len))
+        return [s_m.ratio(row[:length].tolist(), positions=True)
+                for row, length in zip(data.ranks, data.lengths)]
+    player_ids = seq_match.name_ids(data.actual_names)
+    s_m = seq_match.RatioMatcher(seq_match.to_ids(data.actual_names, player_ids))
+    return [s_m.ratio(seq_match.to_ids(names, player_ids)) for names in data.mock_names]
+
+@metric('RBO score')
+def rank_biased_overlap(data):
+    """Rank biased overlap, with p suggested by its creators"""
+    if not data.distinct:
+        # the rank matrix needs each name to have a single rank
+        return [rbo.score(data.actual_names, names) for names in data.mock_names]
+    if not data.ref_len:
+        return np.zeros(len(data.mock_names))
+    return rbo.score_overlaps(data.overlap, data.lengths, data.ref_len)
+
+@metric('Kendall tau')
+def kendall_tau(data):
+    """
+    Kendall's tau between the orders in which a mock and the actual
+    draft have the players that they have in common (0 if they have
+    fewer than two in common)
+    """
+    concordant = np.zeros(len(data.ranks))
+    discordant = np.zeros(len(data.ranks))
+    # compare each pick to every later pick of the same mock
+    for gap in range(1, data.width):
+        earlier, later = data.ranks[:, :-gap], data.ranks[:, gap:]
+        both = (earlier >= 0) & (later >= 0)
+        concordant += np.sum(both & (earlier < later), axis=1)
+        discordant += np.sum(both & (earlier > later), axis=1)
+    pairs = concordant + discordant
+    return np.where(pairs > 0, (concordant - discordant) / np.maximum(pairs, 1), 0.0)
+
+@metric('Footrule')
+def footrule(data):
+    """
+    1 minus Spearman's footrule distance between a mock and the actual
+    draft, as a fraction of the distance between two drafts with no
+    players in common
+    """
+    depths = np.arange(data.width)
+    in_mock = depths < data.lengths[:, None]
+    missing_at = data.missing_at[:, None]
+    # how far each pick of a mock is from where it went in the actual
+    # draft, and how far each player missing from a mock went
+    picked = np.where(data.found, np.abs(depths - data.ranks), missing_at - depths)
+    distance = np.sum(np.where(in_mock, picked, 0), axis=1)
+    actual_depths = np.arange(data.ref_len)
+    distance += np.sum(np.where(data.positions < 0, missing_at - actual_depths, 0), axis=1)
+    most = (np.sum(np.where(in_mock, missing_at - depths, 0), axis=1)
+            + np.sum(missing_at - actual_depths, axis=1))
+    return np.where(most > 0, 1 - distance / np.where(most > 0, most, 1), 0.0)
+
+@metric('Pick distance')
+def pick_distance(data):
+    """
+    1 minus the distance between where each player in the actual draft
+    went and where a mock had them, weighted by 1 / pick number so that
+    misses near the top count most, as a fraction of the greatest
+    distance possible
+    """
+    actual_depths = np.arange(data.ref_len)
+    weights = 1 / (actual_depths + 1)
+    missing_at = data.missing_at[:, None]
+    mocked = np.where(data.positions >= 0, data.positions, missing_at)
+    distance = np.abs(mocked - actual_depths) @ weights
+    most = np.maximum(actual_depths, missing_at - actual_depths) @ weights
+    return np.where(most > 0, 1 - distance / np.where(most > 0, most, 1), 0.0)
@@ -0,0 +1,101 @@
+"""
+Find close matches for names without comparing against every name
+
+An index of character n-grams is built once over all names found in a
+set of drafts. Looking up a name only scores the names that share an
+n-gram with it, and the ranked matches for a name are remembered so
+that each draft only has to filter them by its own names. Names can be
+added at any time (e.g. as drafts are read one by one), and remembered
+matches are updated rather than thrown away.
+
+Matches are scored and ranked in the same way as difflib's
+get_close_matches(): by SequenceMatcher ratio, best first, with ties
+broken in reverse alphabetical order. The results only approximate
+get_close_matches(), though: a name that shares no n-gram with the one
+looked up is never scored, even if its ratio would pass the cutoff
+(e.g. short names, or names with a typo in every n-gram).
+"""
+
+from collections import defaultdict
+from difflib import SequenceMatcher
+
+class NameIndex():
+    """An n-gram index of names for finding close matches"""
+
+    def __init__(self, names=(), gram_size=3):
+        self.gram_size = gram_size
+        # dict: key is an n-gram, value is the set of names containing it
+        self.postings = defaultdict(set)
+        self.names = set()
+        # dict: key is (name, cutoff), value is a tuple of the name's
+        #       n-grams and a list of matches ranked best first, each a
+        #       tuple of (ratio, match)
+        self._ranked = {}
+        for name in names:
+            self.add(name)
+
+    def grams(self, name):
+        """Return the set of n-grams of a name, padded at both ends."""
+        pad = ' ' * (self.gram_size - 1)
+        padded = pad + name + pad
+        return {padded[i:i+self.gram_size] for i in range(len(padded) - self.gram_size + 1)}
+
+    def add(self, name):
+        """Add a name to the index."""
+        if name in self.names:
+            return
+        self.names.add(name)
+        grams = self.grams(name)
+        for gram in grams:
+            self.postings[gram].add(name)
+        # rather than forgetting remembered matches, add the new name to
+        # those it may be a match for
+        for (word, cutoff), (word_grams, scored) in self._ranked.items():
+            if grams & word_grams:
+                s_m = SequenceMatcher(None, name, word)
+                if (s_m.real_quick_ratio() >= cutoff and s_m.quick_ratio() >= cutoff
+                        and s_m.ratio() >= cutoff):
+                    scored.append((s_m.ratio(), name))
+                    scored.sort(reverse=True)
+
+    def candidates(self, word):
+        """Return the indexed names sharing at least one n-gram with word."""
+        found = set()
+        for gram in self.grams(word):
+            found.update(self.postings.get(gram, ()))
+        return found
+
+    def ranked_matches(self, word, cutoff=0.6):
+        """
+        Return every indexed name whose similarity to word is at least
+        cutoff, as a list of (ratio, name) tuples ranked best first
+        """
+        key = (word, cutoff)
+        if key not in self._ranked:
+            s_m = SequenceMatcher()
+            s_m.set_seq2(word)
+            scored = []
+            for name in self.candidates(word):
+                s_m.set_seq1(name)
+                if (s_m.real_quick_ratio() >= cutoff and s_m.quick_ratio() >= cutoff
+                        and s_m.ratio() >= cutoff):
+                    scored.append((s_m.ratio(), name))
+            scored.sort(reverse=True)
+            self._ranked[key] = (self.grams(word), scored)
+        return self._ranked[key][1]
+
+    def close_matches(self, word, possibilities, n=3, cutoff=0.6):
+        """
+        Approximate get_close_matches(word, possibilities, n, cutoff),
+        where possibilities is a set of indexed names: matches are ranked
+        the same way, but only names sharing an n-gram with word are found
+        """
+        matches = []
+        if n <= 0:
+            return matches
+        for _, name in self.ranked_matches(word, cutoff):
+            if name in possibilities:
+                matches.append(name)
+                if len(matches) == n:
+                    break
+        return matches
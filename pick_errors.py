@@ -0,0 +1,115 @@
+"""
+How close mock drafts came for each player and pick, not just overall
+
+A matrix of where every mock had each player in the actual draft is
+made once, from the player IDs of the drafts, and every aggregate is a
+reduction over it:
+ - each mock's absolute pick error for each player
+ - the hit rate at each pick: how many mocks had the right player there
+ - the range of each player's projections (earliest, latest, average)
+
+The matrix can be saved as a .npy file or as CSV for other tools.
+"""
+
+import csv
+
+import numpy as np
+
+# position of a player a mock doesn't have
+MISSING = -1
+
+def position_matrix(actual_ids, mock_ids):
+    """
+    Given the player IDs of an official draft and of each mock (from the
+    same registry of IDs), return a matrix whose [k, i] is the 0-based
+    position in mock k of the player picked i-th in the actual draft,
+    or MISSING
+    """
+    actual_ids = np.asarray(actual_ids, dtype=np.intp)
+    lengths = np.array([len(ids) for ids in mock_ids], dtype=np.intp)
+    picks = (np.concatenate([np.asarray(ids, dtype=np.intp) for ids in mock_ids])
+             if len(mock_ids) else np.zeros(0, dtype=np.intp))
+    n_ids = max(actual_ids.max(initial=-1), picks.max(initial=-1)) + 1
+    # rank of each ID in the actual draft (the first, if it is repeated)
+    rank_of = np.full(n_ids, MISSING, dtype=np.intp)
+    unique_ids, first_ranks = np.unique(actual_ids, return_index=True)
+    rank_of[unique_ids] = first_ranks
+
+    ranks = rank_of[picks]
+    rows = np.repeat(np.arange(len(lengths)), lengths)
+    depths = np.arange(len(picks)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    found = ranks != MISSING
+    # if a mock has a player more than once, keep the first
+    not_found = np.iinfo(np.int32).max
+    positions = np.full((len(lengths), len(actual_ids)), not_found, dtype=np.int32)
+    np.minimum.at(positions, (rows[found], ranks[found]), depths[found])
+    positions[positions == not_found] = MISSING
+    return positions
+
+class PickErrors():
+    """Where every mock draft had each player in the actual draft"""
+
+    def __init__(self, actual, mocks):
+        self.mocks = list(mocks)
+        self.players = list(actual.player_list)
+        self.lengths = np.array([len(mock.player_ids) for mock in self.mocks], dtype=np.intp)
+        self.positions = position_matrix(actual.player_ids,
+                                         [mock.player_ids for mock in self.mocks])
+        self.found = self.positions != MISSING
+        self.picks = np.arange(len(self.players))
+
+    def errors(self):
+        """
+        Return a matrix of each mock's absolute pick error for each
+        player, or MISSING if the mock doesn't have them
+        """
+        return np.where(self.found, np.abs(self.positions - self.picks), MISSING)
+
+    def hit_rates(self):
+        """
+        Return, for each pick, the fraction of the mocks with that many
+        picks that had the right player there (nan if none do)
+        """
+        hits = np.sum(self.positions == self.picks, axis=0)
+        long_enough = np.sum(self.lengths[:, None] > self.picks, axis=0)
+        return np.where(long_enough > 0, hits / np.maximum(long_enough, 1), np.nan)
+
+    def mean_errors(self, axis=0):
+        """
+        Return the average absolute pick error of each player (axis=0),
+        over the mocks that have them, or of each mock (axis=1), over
+        the players it has (nan if there are none)
+        """
+        counts = np.sum(self.found, axis=axis)
+        totals = np.sum(np.where(self.found, np.abs(self.positions - self.picks), 0), axis=axis)
+        return np.where(counts > 0, totals / np.maximum(counts, 1), np.nan)
+
+    def projections(self):
+        """
+        Return arrays of the number of mocks that have each player, and
+        the earliest, latest, and average 0-based position they were
+        projected at (MISSING, or nan for the average, if no mock has them)
+        """
+        appearances = np.sum(self.found, axis=0)
+        earliest = np.where(self.found, self.positions, np.iinfo(np.int32).max).min(
+            axis=0, initial=np.iinfo(np.int32).max)
+        earliest = np.where(appearances > 0, earliest, MISSING)
+        latest = self.positions.max(axis=0, initial=MISSING)
+        totals = np.sum(np.where(self.found, self.positions, 0), axis=0)
+        average = np.where(appearances > 0, totals / np.maximum(appearances, 1), np.nan)
+        return appearances, earliest, latest, average
+
+    def save(self, path):
+        """
+        Save the matrix of positions to path, as a .npy file if path
+        ends in .npy, or else as CSV with a row per mock (labeled with
+        its org name and time of update) and a column per player
+        """
+        if path.endswith('.npy'):
+            np.save(path, self.positions)
+            return
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(['Organization', 'Time of update'] + self.players)
+            for mock, row in zip(self.mocks, self.positions.tolist()):
+                writer.writerow([mock.org_name, mock.time_of_update] + row)
@@ -0,0 +1,147 @@
+"""
+Standardize the name of every prospect in a draft class at once
+
+Every name in any draft of a class (not only the drafted players) is
+put in a cluster with the other spellings of the same player's name:
+ - candidate pairs are found by blocking: a NameIndex only compares
+   names that share an n-gram, and pairs less than cutoff similar are
+   dropped
+ - each distinct pair is decided once (from saved decisions, or else by
+   asking), most similar first, and matches are joined by union-find
+ - two names in the same draft are different players, so a pair whose
+   clusters have a draft in common is never asked about, and neither
+   is a pair whose clusters have names decided not to match
+
+The canonical name of a cluster is its name in the actual draft if it
+has one, or else its spelling found in the most drafts.
+"""
+
+from collections import defaultdict
+
+from name_index import NameIndex
+
+class ProspectRegistry():
+    """Clusters of the names in a draft class that describe the same player"""
+
+    def __init__(self, actual, mocks, cutoff=0.6):
+        self.draft_class = actual.draft_class()
+        self.actual_names = set(actual.player_list)
+        self.cutoff = cutoff
+        # dict: key is a name, value is the set of indices of the drafts
+        #       that have it (for a root, of the drafts with any name in
+        #       its cluster)
+        self.drafts_of = defaultdict(set)
+        for index, draft in enumerate([actual] + list(mocks)):
+            for name in draft.player_set:
+                self.drafts_of[name].add(index)
+        # dict: key is a name, value is the number of drafts that have it
+        self.counts = {name: len(drafts) for name, drafts in self.drafts_of.items()}
+        # union-find forest: key is a name, value is its parent
+        self.parent = {name: name for name in self.drafts_of}
+        # dict: key is a root, value is a list of the names in its cluster
+        self.members = {name: [name] for name in self.parent}
+        # dict: key is a name, value is a set of names decided not to match it
+        self.apart = defaultdict(set)
+
+    def find(self, name):
+        """Return the root of the cluster of a name."""
+        while self.parent[name] != name:
+            # path halving
+            self.parent[name] = self.parent[self.parent[name]]
+            name = self.parent[name]
+        return name
+
+    def union(self, name_1, name_2):
+        """Join the clusters of two names."""
+        root_1, root_2 = self.find(name_1), self.find(name_2)
+        if root_1 == root_2:
+            return
+        if len(self.drafts_of[root_1]) < len(self.drafts_of[root_2]):
+            root_1, root_2 = root_2, root_1
+        self.parent[root_2] = root_1
+        self.drafts_of[root_1] |= self.drafts_of.pop(root_2)
+        self.members[root_1] += self.members.pop(root_2)
+
+    def separate(self, name_1, name_2):
+        """Keep the clusters of two names from ever being joined."""
+        self.apart[name_1].add(name_2)
+        self.apart[name_2].add(name_1)
+
+    def can_join(self, name_1, name_2):
+        """
+        Return whether two names are in different clusters that could be
+        joined (no draft has a name from each, and no name in one was
+        decided not to match a name in the other)
+        """
+        root_1, root_2 = self.find(name_1), self.find(name_2)
+        if root_1 == root_2 or not self.drafts_of[root_1].isdisjoint(self.drafts_of[root_2]):
+            return False
+        if len(self.members[root_1]) > len(self.members[root_2]):
+            root_1, root_2 = root_2, root_1
+        return not any(self.find(other) == root_2
+                       for name in self.members[root_1] for other in self.apart.get(name, ()))
+
+    def candidate_pairs(self):
+        """
+        Return a list of (name, variation) for each distinct pair of
+        names at least cutoff similar, most similar first, where name is
+        the one more likely to be canonical
+        """
+        index = NameIndex(self.parent)
+        similarity = {}
+        for word in self.parent:
+            for ratio, name in index.ranked_matches(word, self.cutoff):
+                if name != word:
+                    pair = tuple(sorted((word, name), key=self._preference))
+                    similarity[pair] = max(similarity.get(pair, 0), ratio)
+        return sorted(similarity, key=lambda pair: (-similarity[pair], pair))
+
+    def _preference(self, name):
+        """Sort key that puts the best choice of canonical name first."""
+        return name not in self.actual_names, -self.counts[name], name
+
+    def resolve(self, ask, aliases=None):
+        """
+        Decide every candidate pair that can still be joined and join the
+        matches, and return the number of candidate pairs
+
+        Decisions in an AliasStore (if given) are used without asking;
+        otherwise ask(name, variation) is called, which returns whether
+        they are the same player, or None if it is left undecided
+        """
+        pairs = self.candidate_pairs()
+        # saved non-matches are known up front, so that no cluster is
+        # joined (through other names) to one it was decided against
+        decided = {}
+        if aliases is not None:
+            for name, variation in pairs:
+                decided[name, variation] = aliases.decision(self.draft_class, name, variation)
+                if decided[name, variation] is False:
+                    self.separate(name, variation)
+        for name, variation in pairs:
+            if not self.can_join(name, variation):
+                continue
+            is_match = decided.get((name, variation))
+            if is_match is None:
+                is_match = ask(name, variation)
+                if is_match is not None and aliases is not None:
+                    aliases.record(self.draft_class, name, variation, is_match)
+            if is_match:
+                self.union(name, variation)
+            elif is_match is False:
+                self.separate(name, variation)
+        return len(pairs)
+
+    def canonical_names(self):
+        """
+        Return a dict whose key is a name and whose value is the
+        canonical name of its cluster
+        """
+        clusters = defaultdict(list)
+        for name in self.parent:
+            clusters[self.find(name)].append(name)
+        canonical = {}
+        for names in clusters.values():
+            best = min(names, key=self._preference)
+            canonical.update((name, best) for name in names)
+        return canonical
@@ -9,6 +9,11 @@ RBO conceptualization and formulation described in:
 http://www.williamwebber.com/research/papers/wmz10_tois.pdf
 """
 
+from functools import lru_cache
+import heapq
+
+import numpy as np
+
 def score(list_1, list_2, p=0.0):
     """Calculates Ranked Biased Overlap (RBO) score.
 
@@ -40,29 +45,37 @@ def score(list_1, list_2, p=0.0):
 
     # Calculate the overlaps at ranks 1 through long_len
     # (the longer of the two lists)
+    return extrapolate(list(overlaps(short_list, long_list)), short_len, long_len, p)
+
+def overlaps(short_list, long_list):
+    """Yields the overlap of two lists at each depth of the longer one."""
     short_set = set([]) # contains elements from the smaller list to depth i
     long_set = set([]) # contains elements from the longer list to depth i
-    x_d = {0: 0}
-    sum1 = 0.0
-    for i in range(long_len):
-        long_elem = long_list[i]
-        short_elem = short_list[i] if i < short_len else None
-        d = i + 1
+    overlap = 0
+    for i, long_elem in enumerate(long_list):
+        short_elem = short_list[i] if i < len(short_list) else None
 
         # if two elements are same then
         # we don't need to add to either of the set
         if long_elem == short_elem:
-            x_d[d] = x_d[d-1] + 1.0
+            overlap = overlap + 1.0
         # else add items to respective list
         # and calculate overlap
         else:
             long_set.add(long_elem)
             if short_elem != None:
                 short_set.add(short_elem)
-            x_d[d] = (x_d[d-1]
-                      + (1.0 if long_elem in short_set else 0.0)
-                      + (1.0 if short_elem in long_set else 0.0))
-        #calculate average overlap
+            overlap = (overlap
+                       + (1.0 if long_elem in short_set else 0.0)
+                       + (1.0 if short_elem in long_set else 0.0))
+        yield overlap
+
+def extrapolate(overlap, short_len, long_len, p):
+    """Calculates Equation 32 from the overlaps at depths 1 to long_len."""
+    x_d = dict(enumerate(overlap, 1))
+    #calculate average overlap
+    sum1 = 0.0
+    for d in range(1, long_len+1):
         sum1 += x_d[d]/d * pow(p, d)
 
     if short_len != long_len:
@@ -79,3 +92,247 @@ def score(list_1, list_2, p=0.0):
     # Equation 32
     rbo_ext = (1-p) / p * (sum1+sum2) + sum3
     return rbo_ext
+
+@lru_cache(maxsize=64)
+def tail_bounds(short_len, long_len, p):
+    """Returns the tables that bounds() needs for a pair of lengths.
+
+    Equation 32 is a sum of the overlap at each depth d times a weight.
+    Given the overlap x at depth t, the overlap at every deeper depth
+    is at least x, and at most x plus 2 per depth (1 past the shorter
+    list's end), but never more than d (or the shorter list's length).
+    Returns the weights, the sum of the weights past each depth t, and
+    a table of the most the depths past t can add given x.
+    """
+    depths = np.arange(1, long_len + 1)
+    weights = (1-p) / p * np.power(p, depths) / np.minimum(depths, short_len)
+    weights[long_len - 1] += pow(p, long_len) / long_len
+    if short_len != long_len:
+        weights[short_len - 1] += pow(p, long_len) * (1/short_len - 1/long_len)
+    tails = np.concatenate([np.cumsum(weights[::-1])[::-1], [0.0]])
+
+    caps = np.minimum(depths, short_len)
+    steps = np.cumsum(np.where(depths <= short_len, 2, 1))
+    steps = np.concatenate([[0], steps])
+    most = np.zeros((long_len + 1, 2 * long_len + 1))
+    for t in range(long_len):
+        later = slice(t, long_len)
+        # rows are values of x, columns are depths past t
+        reach = (np.arange(2 * long_len + 1)[:, None]
+                 + steps[t+1:] - steps[t])
+        most[t] = np.minimum(caps[later], reach) @ weights[later]
+    return weights.tolist(), tails.tolist(), most.tolist()
+
+def bounds(list_1, list_2, p=0.0):
+    """Yields bounds on score(list_1, list_2, p) while walking the lists.
+
+    Following Webber et al., the score is bounded at each depth by the
+    score it would have if nothing more overlapped (RBO_min) plus the
+    most that the rest of the lists could add (RBO_res). Here, both
+    are bounds on the extrapolated score of the two finite lists, so
+    at the end of the longer list, RBO_res is 0 and RBO_min is the
+    score itself. Yields a tuple (depth, rbo_min, rbo_res) per depth.
+
+    The bounds assume that neither list repeats an item.
+    """
+    if list_1 is None:
+        list_1 = []
+    if list_2 is None:
+        list_2 = []
+    (short_len, short_list), (long_len, long_list) = sorted(
+        [(len(list_1), list_1), (len(list_2), list_2)]
+        )
+    if short_len == 0 or (not p and long_len == 1):
+        final = score(list_1, list_2, p)
+        yield long_len, final, 0.0
+        return
+    p = p or 1 - 1/long_len
+    weights, tails, most = tail_bounds(short_len, long_len, p)
+    known = 0.0
+    overlap = []
+    for d, x in enumerate(overlaps(short_list, long_list), 1):
+        overlap.append(x)
+        if d == long_len:
+            yield d, extrapolate(overlap, short_len, long_len, p), 0.0
+        else:
+            known += weights[d-1] * x
+            rbo_min = known + x * tails[d]
+            yield d, rbo_min, known + most[d][int(x)] - rbo_min
+
+def top_k(reference, candidates, k, p=0.0):
+    """Finds the candidates most similar to a reference by RBO score.
+
+    reference  -- Ranked list to which every candidate is compared
+    candidates -- Iterable of ranked lists
+    k          -- Number of candidates to keep
+    p          -- Same as in score()
+
+    Returns a list of (index, score) tuples of the k best candidates,
+    best first (ties go to the earlier candidate). Each candidate is
+    walked with bounds(), and dropped as soon as its upper bound can't
+    beat the k-th best score so far, so most candidates are never
+    scored in full. The scores are the same as those of score().
+
+    Walking bounds() is pure Python, so for many candidates this is
+    slower than score_many() and a sort; it pays off only when
+    candidates are very long and k is small.
+    """
+    if reference is None:
+        reference = []
+    distinct = len(set(reference)) == len(reference)
+    best = [] # min-heap of (score, -index) of the best so far
+    for index, candidate in enumerate(candidates):
+        if candidate is None:
+            candidate = []
+        if not distinct or len(set(candidate)) != len(candidate):
+            final = score(reference, candidate, p)
+        else:
+            for _, rbo_min, rbo_res in bounds(reference, candidate, p):
+                # leave a little room for rounding error
+                if len(best) == k and rbo_min + rbo_res < best[0][0] - 1e-12:
+                    final = None
+                    break
+            else:
+                final = rbo_min
+        if final is None:
+            continue
+        if len(best) < k:
+            heapq.heappush(best, (final, -index))
+        elif (final, -index) > best[0]:
+            heapq.heapreplace(best, (final, -index))
+    return [(-neg_index, final) for final, neg_index in sorted(best, reverse=True)]
+
+def rank_matrix(reference, candidates):
+    """Convert candidate lists into a matrix of ranks in the reference.
+
+    reference  -- Ranked list whose items are assumed to be distinct
+    candidates -- Iterable of ranked lists to be compared to reference
+
+    Returns a tuple (ranks, lengths). Row k of ranks holds, for each
+    position of candidate k, the 0-based rank of that item in the
+    reference, or -1 if the item is not in the reference (or if the
+    position lies past the end of the candidate). The matrix is wide
+    enough to cover both the reference and the longest candidate.
+    """
+    rank_of = {}
+    for rank, item in enumerate(reference):
+        rank_of.setdefault(item, rank)
+    candidates = [list(c) if c is not None else [] for c in candidates]
+    lengths = np.fromiter((len(c) for c in candidates), dtype=np.intp,
+                          count=len(candidates))
+    width = max(len(reference), int(lengths.max()) if len(candidates) else 0)
+    ranks = np.full((len(candidates), width), -1, dtype=np.intp)
+    for row, candidate in zip(ranks, candidates):
+        row[:len(candidate)] = [rank_of.get(item, -1) for item in candidate]
+    return ranks, lengths
+
+def overlap_table(ranks):
+    """Calculates the overlap at every depth from a matrix made by rank_matrix().
+
+    Returns a matrix whose row k holds the overlap of candidate k and
+    the reference at depths 1 through the width of ranks. The quirks
+    of score() for items repeated within a candidate are reproduced so
+    that the results agree with it.
+    """
+    width = ranks.shape[1]
+    positions = np.arange(width)
+    found = ranks >= 0
+    # a "diagonal" match is an item found at the same depth in both
+    diag = ranks == positions
+    # an item seen earlier in the reference counts at its depth in
+    # the candidate, unless the reference's item there was a diagonal
+    diag_at_rank = np.take_along_axis(diag, np.where(found, ranks, 0), axis=1)
+    contrib = diag.astype(np.intp)
+    contrib += found & (ranks < positions) & ~diag_at_rank
+    # an item seen earlier in the candidate counts (once) at its depth
+    # in the reference, unless the candidate's item there was diagonal
+    seen_early = np.zeros(ranks.shape, dtype=bool)
+    rows, cols = np.nonzero(found & (ranks > positions))
+    seen_early[rows, ranks[rows, cols]] = True
+    contrib += seen_early & ~diag
+    return np.cumsum(contrib, axis=1)
+
+def score_ranks(ranks, lengths, ref_len, p=0.0):
+    """Calculates RBO scores from a matrix made by rank_matrix().
+
+    ranks   -- Matrix of candidate items' ranks in the reference
+    lengths -- Length of each candidate
+    ref_len -- Length of the reference
+    p       -- Same as in score(); if 0, each candidate gets the
+               suggested value of (1 - 1/k) for its own pair of lists
+
+    The overlap at every depth is found for all candidates at once.
+    """
+    if not len(ranks) or not ref_len:
+        return np.zeros(len(ranks))
+    return score_overlaps(overlap_table(ranks), lengths, ref_len, p)
+
+def score_overlaps(overlap, lengths, ref_len, p=0.0):
+    """Calculates RBO scores from a matrix made by overlap_table().
+
+    The other arguments are the same as in score_ranks(), except that
+    ref_len can also be an array of each row's reference length (when
+    each row was compared to a different reference).
+    """
+    n_rows, width = overlap.shape
+    if not n_rows or not np.any(ref_len):
+        return np.zeros(n_rows)
+    short_len = np.minimum(lengths, ref_len)
+    long_len = np.maximum(lengths, ref_len)
+    empty = short_len == 0
+    # avoid dividing by zero; these rows are zeroed at the end
+    short_len = np.where(empty, 1, short_len)
+    long_len = np.where(empty, 1, long_len)
+    if p:
+        p_row = np.full(n_rows, float(p))
+    else:
+        p_row = 1 - 1/long_len
+        single = long_len == 1
+        # letting p be 0 would screw up some calculations
+        p_row[single] = 0.5
+
+    # only one row of powers is needed per distinct value of p
+    p_values, p_index = np.unique(p_row, return_inverse=True)
+    depths = np.arange(1, width + 1)
+    powers = np.power.outer(p_values, depths)[p_index.reshape(-1)]
+
+    in_long = depths <= long_len[:, None]
+    past_short = in_long & (depths > short_len[:, None])
+    weighted = overlap * powers
+    sum1 = np.sum(np.where(in_long, weighted / depths, 0.0), axis=1)
+    sum2 = np.sum(np.where(past_short,
+                           weighted * (depths - short_len[:, None])
+                           / (depths * short_len[:, None]),
+                           0.0), axis=1)
+    x_short = overlap[np.arange(n_rows), short_len - 1]
+    x_long = overlap[np.arange(n_rows), long_len - 1]
+    sum3 = (((x_long - x_short)/long_len + x_short/short_len)
+            * powers[np.arange(n_rows), long_len - 1])
+
+    # Equation 32
+    rbo_ext = (1-p_row) / p_row * (sum1+sum2) + sum3
+    if not p:
+        rbo_ext[single] = x_long[single]
+    rbo_ext[empty] = 0
+    return rbo_ext
+
+def score_many(reference, candidates, p=0.0):
+    """Calculates the RBO score of each candidate against a reference.
+
+    reference  -- Ranked list to which every candidate is compared
+    candidates -- Iterable of ranked lists
+    p          -- Same as in score()
+
+    Equivalent to [score(reference, c, p) for c in candidates], but the
+    reference is indexed once and all candidates are scored together
+    with array operations. Returns a NumPy array of scores in the
+    order of the candidates.
+    """
+    if reference is None:
+        reference = []
+    candidates = list(candidates)
+    if len(set(reference)) != len(reference):
+        # the rank matrix needs each item to have a single rank
+        return np.array([score(reference, c, p) for c in candidates], dtype=float)
+    ranks, lengths = rank_matrix(reference, candidates)
+    return score_ranks(ranks, lengths, len(reference), p)
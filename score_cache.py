@@ -0,0 +1,57 @@
+"""
+Keep similarity scores across executions so that unchanged drafts are
+not scored again
+
+Each score is keyed by a hash of the actual draft's player list, the
+mock draft's player list (after names have been standardized), the
+name of the similarity measure, and its parameter p (if any). Scores
+are kept in a JSON file in order from least to most recently used, and
+the least recently used are dropped when there are too many.
+"""
+
+from collections import OrderedDict
+import hashlib
+import json
+import os
+
+class ScoreCache():
+    """Similarity scores keyed by the content of what was compared"""
+
+    def __init__(self, path, max_entries=100000):
+        self.path = path
+        self.max_entries = max_entries
+        # dict: key is a hash, value is a score; least recently used first
+        self.scores = OrderedDict()
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.scores.update(json.load(f))
+
+    @staticmethod
+    def key(actual_names, mock_names, measure, p=None):
+        """Return the key of a score."""
+        content = json.dumps([list(actual_names), list(mock_names), measure, p],
+                             ensure_ascii=False)
+        return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Return the score with the given key, or None if there isn't one."""
+        score = self.scores.get(key)
+        if score is not None:
+            self.scores.move_to_end(key)
+        return score
+
+    def put(self, key, score):
+        """Add (or replace) a score."""
+        self.scores[key] = score
+        self.scores.move_to_end(key)
+
+    def save(self):
+        """Drop the least recently used scores if necessary and save the rest."""
+        while len(self.scores) > self.max_entries:
+            self.scores.popitem(last=False)
+        # write to a new file first so that an interruption can't leave
+        # a half-written cache behind
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(list(self.scores.items()), f)
+        os.replace(temp_path, self.path)
@@ -0,0 +1,171 @@
+"""
+Calculate the ratio of difflib's SequenceMatcher for sequences of ints
+
+Draft orders are converted into sequences of integer player IDs so that
+many mock drafts can be compared to one actual draft without hashing
+and comparing names over and over again. When the fixed sequence has no
+repeated items (as in an actual draft), the longest matching block in a
+range can be found with a single pass instead of the general search.
+
+Results are the same as SequenceMatcher(None, a, b).ratio(), including
+the "popular item" junk heuristic that SequenceMatcher applies to
+sequences of 200 or more items when autojunk is true.
+"""
+
+from array import array
+
+def name_ids(names):
+    """Give each distinct name an integer ID, in order of appearance."""
+    ids = {}
+    for name in names:
+        ids.setdefault(name, len(ids))
+    return ids
+
+def to_ids(names, ids):
+    """
+    Convert a sequence of names into an array of integer IDs
+
+    Names that have no ID cannot match anything that was given one, so
+    they all share the ID -1.
+    """
+    return array('i', (ids.get(name, -1) for name in names))
+
+class RatioMatcher():
+    """Compare any number of int sequences to one fixed sequence"""
+
+    def __init__(self, b, autojunk=True):
+        self.b = b
+        # same as SequenceMatcher's b2j: positions of each item in b,
+        # minus items considered "popular" if autojunk is true
+        b2j = {}
+        for j, item in enumerate(b):
+            b2j.setdefault(item, []).append(j)
+        n = len(b)
+        # if nothing in b is repeated, each item has exactly one position
+        # (and no item can be popular)
+        self.b_pos = ({item: idxs[0] for item, idxs in b2j.items()}
+                      if len(b2j) == n else None)
+        if autojunk and n >= 200:
+            ntest = n // 100 + 1
+            for item in [item for item, idxs in b2j.items() if len(idxs) > ntest]:
+                del b2j[item]
+        self.b2j = b2j
+
+    def find_longest_match(self, a, alo, ahi, blo, bhi):
+        """
+        Find the longest matching block in a[alo:ahi] and b[blo:bhi]
+
+        Ties are broken the same way as in SequenceMatcher: the block
+        that starts earliest in a, then earliest in b, is returned.
+        """
+        b, b2j = self.b, self.b2j
+        besti, bestj, bestsize = alo, blo, 0
+        j2len = {}
+        nothing = []
+        for i in range(alo, ahi):
+            j2lenget = j2len.get
+            newj2len = {}
+            for j in b2j.get(a[i], nothing):
+                if j < blo:
+                    continue
+                if j >= bhi:
+                    break
+                k = newj2len[j] = j2lenget(j-1, 0) + 1
+                if k > bestsize:
+                    besti, bestj, bestsize = i-k+1, j-k+1, k
+            j2len = newj2len
+
+        # extend the block over equal items that were left out of b2j
+        # for being popular
+        while (besti > alo and bestj > blo
+               and a[besti-1] == b[bestj-1]):
+            besti, bestj, bestsize = besti-1, bestj-1, bestsize+1
+        while (besti+bestsize < ahi and bestj+bestsize < bhi
+               and a[besti+bestsize] == b[bestj+bestsize]):
+            bestsize += 1
+
+        return besti, bestj, bestsize
+
+    @staticmethod
+    def find_longest_run(a_pos, alo, ahi, blo, bhi):
+        """
+        Same as find_longest_match() for a b with no repeated items,
+        given the position in b of each item of a (or -1)
+
+        A block is a run of consecutive items of a that are found at
+        consecutive positions of b, so one pass over a is enough.
+        """
+        besti, bestj, bestsize = alo, blo, 0
+        prev_j, run = -2, 0
+        for i in range(alo, ahi):
+            j = a_pos[i]
+            if blo <= j < bhi:
+                run = run + 1 if j == prev_j + 1 else 1
+                prev_j = j
+                if run > bestsize:
+                    besti, bestj, bestsize = i-run+1, j-run+1, run
+            else:
+                prev_j, run = -2, 0
+        return besti, bestj, bestsize
+
+    def matches(self, a, positions=False):
+        """
+        Return the total size of the matching blocks of a and b
+
+        If positions is true, a is given as the position in b of each
+        of its items (or -1), which is only possible if b has no
+        repeated items
+        """
+        if positions:
+            find = self.find_longest_run
+        elif self.b_pos is not None:
+            b_pos_get = self.b_pos.get
+            a = [b_pos_get(item, -1) for item in a]
+            find = self.find_longest_run
+        else:
+            find = self.find_longest_match
+        return matching_size(find, a, len(self.b))
+
+    def ratio(self, a, positions=False):
+        """
+        Return the same value as SequenceMatcher(None, a, b).ratio()
+
+        positions is the same as in matches()
+        """
+        length = len(a) + len(self.b)
+        if length:
+            return 2.0 * self.matches(a, positions) / length
+        return 1.0
+
+def matching_size(find, a, b_len):
+    """
+    Return the total size of the matching blocks of a and a b of length
+    b_len, where find(a, alo, ahi, blo, bhi) finds the longest block
+    """
+    total = 0
+    queue = [(0, len(a), 0, b_len)]
+    while queue:
+        alo, ahi, blo, bhi = queue.pop()
+        i, j, k = find(a, alo, ahi, blo, bhi)
+        if k:
+            total += k
+            if alo < i and blo < j:
+                queue.append((alo, i, blo, j))
+            if i+k < ahi and j+k < bhi:
+                queue.append((i+k, ahi, j+k, bhi))
+    return total
+
+def position_ratio(a_pos, b_len):
+    """
+    Return the same value as SequenceMatcher(None, a, b).ratio() for a b
+    of length b_len with no repeated items, given the position in b of
+    each item of a (or -1)
+    """
+    length = len(a_pos) + b_len
+    if length:
+        return 2.0 * matching_size(RatioMatcher.find_longest_run, a_pos, b_len) / length
+    return 1.0
+
+def ratio(a, b, autojunk=True):
+    """Return the same value as SequenceMatcher(None, a, b, autojunk).ratio()."""
+    return RatioMatcher(b, autojunk).ratio(a)
@@ -0,0 +1,109 @@
+"""
+Test whether mock drafts score better than chance
+
+For each draft class, many rankings are made from the actual draft:
+ - random: the actual draft in a random order
+ - window: each pick is moved by a random amount of at most window
+   spots (so the result is a lightly shuffled actual draft)
+and scored against the actual draft in batches through metrics, in
+worker processes. A mock's p-value is the chance that such a ranking
+(of the mock's length) scores at least as well as the mock, and its
+percentile is where the mock's score falls among theirs.
+
+Resampling is seeded per class, mock length, and batch, so results
+are the same no matter how many workers are used.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import metrics
+
+KINDS = ('random', 'window')
+
+# number of rankings scored per job
+BATCH_SIZE = 2000
+
+def resample(actual_names, length, count, kind='random', window=5, seed=None):
+    """
+    Return count rankings of the given length made from the actual
+    draft by a kind in KINDS, as lists of names
+
+    Rankings longer than the actual draft end with made-up names that
+    can't match anything in it.
+    """
+    rng = np.random.default_rng(seed)
+    actual_len = len(actual_names)
+    if kind == 'window':
+        # a pick can only pass the picks whose keys can cross its own,
+        # which are at most window spots away
+        keys = np.arange(actual_len) + rng.uniform(0, window + 1, (count, actual_len))
+    elif kind == 'random':
+        keys = rng.random((count, actual_len))
+    else:
+        raise ValueError('Unknown kind of resampling: {}'.format(kind))
+    orders = np.argsort(keys, axis=1)[:, :length]
+    names = np.array(list(actual_names) + ['#undrafted {}'.format(i)
+                                           for i in range(max(length - actual_len, 0))],
+                     dtype=object)
+    if length > actual_len:
+        extra = np.broadcast_to(np.arange(actual_len, length), (count, length - actual_len))
+        orders = np.concatenate([orders, extra], axis=1)
+    return names[orders].tolist()
+
+def null_scores(actual_names, length, count, kind, window, seed, measure_names):
+    """
+    Return a dict whose key is the name of a measure and whose value is
+    an array of the scores of count resampled rankings
+    """
+    rankings = resample(actual_names, length, count, kind, window, seed)
+    scores = metrics.score_all(actual_names, rankings, measure_names)
+    return {name: np.array(scores[name]) for name in measure_names}
+
+def null_distributions(classes, resamples, kind='random', window=5, seed=0,
+                       measure_names=None, workers=None):
+    """
+    Given a list of (actual names, [mock lengths]) for each draft class,
+    return a list (one per class) of dicts whose key is a mock length
+    and whose value is a dict of each measure's sorted null scores
+    """
+    measure_names = list(measure_names or metrics.METRICS)
+    jobs = []
+    for class_index, (actual_names, lengths) in enumerate(classes):
+        for length in sorted(set(lengths)):
+            batches = range(0, resamples, BATCH_SIZE)
+            seeds = np.random.SeedSequence(seed, spawn_key=(class_index, length)).spawn(len(batches))
+            for start, batch_seed in zip(batches, seeds):
+                jobs.append((class_index, length, (
+                    list(actual_names), length, min(BATCH_SIZE, resamples - start),
+                    kind, window, batch_seed, measure_names)))
+
+    args = [job_args for _, _, job_args in jobs]
+    if len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            scored = list(pool.map(null_scores, *zip(*args)))
+    else:
+        scored = [null_scores(*a) for a in args]
+
+    nulls = [{} for _ in classes]
+    for (class_index, length, _), scores in zip(jobs, scored):
+        by_measure = nulls[class_index].setdefault(length, {name: [] for name in measure_names})
+        for name in measure_names:
+            by_measure[name].append(scores[name])
+    for by_length in nulls:
+        for by_measure in by_length.values():
+            for name, parts in by_measure.items():
+                by_measure[name] = np.sort(np.concatenate(parts))
+    return nulls
+
+def p_value(score, null):
+    """Return the chance of a score at least as high, given sorted null scores."""
+    at_least = len(null) - np.searchsorted(null, score, side='left')
+    return (1 + at_least) / (1 + len(null))
+
+def percentile(score, null):
+    """Return the fraction of sorted null scores below a score (ties count half)."""
+    below = np.searchsorted(null, score, side='left')
+    ties = np.searchsorted(null, score, side='right') - below
+    return (below + ties / 2) / len(null)
@@ -0,0 +1,131 @@
+"""
+Compute the similarity of every pair of mock drafts
+
+Both the SequenceMatcher ratio and RBO score of every pair of drafts
+are computed. Every name is given an integer ID, and the drafts are put
+into one padded matrix of IDs in shared memory. The pairs are split
+into square tiles, and each tile is computed by a worker process that
+writes its scores straight into shared result matrices.
+
+Entry [i, j] of each result compares draft i to draft j, with draft j
+in the role that the actual draft has in evaluate(): the second
+sequence for SequenceMatcher and the reference for RBO.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import rbo
+import seq_match
+
+# shared arrays attached by each worker process
+WORKER_ARRAYS = {}
+
+def encode_drafts(drafts):
+    """
+    Return a matrix whose row k holds the player IDs of draft k, padded
+    with -1, and an array of the drafts' lengths
+    """
+    player_ids = {}
+    rows = [[player_ids.setdefault(name, len(player_ids)) for name in draft.player_list]
+            for draft in drafts]
+    lengths = np.array([len(row) for row in rows], dtype=np.int32)
+    ids = np.full((len(rows), max(lengths, default=0)), -1, dtype=np.int32)
+    for row, id_row in zip(ids, rows):
+        row[:len(id_row)] = id_row
+    return ids, lengths
+
+def compute_tile(arrays, rows, cols, p=0.0):
+    """Fill in the entries of both result matrices for a tile."""
+    ids, lengths = arrays['ids'], arrays['lengths']
+    n_ids = int(ids.max()) + 1 if ids.size else 0
+    row_ids = ids[rows.start:rows.stop]
+    row_lengths = lengths[rows.start:rows.stop]
+    row_lists = [r[:n].tolist() for r, n in zip(row_ids, row_lengths)]
+    for j in range(cols.start, cols.stop):
+        reference = ids[j, :lengths[j]]
+        ratio_matcher = seq_match.RatioMatcher(reference.tolist())
+        arrays['sequence_matcher'][rows, j] = [ratio_matcher.ratio(r) for r in row_lists]
+
+        if len(np.unique(reference)) == len(reference):
+            # rank of each ID in the reference; the extra last slot
+            # gives padding (-1) a rank of -1
+            rank_of = np.full(n_ids + 1, -1, dtype=np.intp)
+            rank_of[reference] = np.arange(len(reference))
+            ranks = rank_of[row_ids]
+            if ranks.shape[1] < len(reference):
+                ranks = np.pad(ranks, ((0, 0), (0, len(reference) - ranks.shape[1])),
+                               constant_values=-1)
+            scores = rbo.score_ranks(ranks, row_lengths, len(reference), p)
+        else:
+            scores = [rbo.score(reference.tolist(), r, p) for r in row_lists]
+        arrays['rbo'][rows, j] = scores
+
+def attach(names, shapes):
+    """Attach to shared arrays in a worker process."""
+    from multiprocessing import shared_memory
+    for key, name in names.items():
+        block = shared_memory.SharedMemory(name=name)
+        dtype = np.int32 if key in ('ids', 'lengths') else np.float64
+        WORKER_ARRAYS[key] = np.ndarray(shapes[key], dtype=dtype, buffer=block.buf)
+        # keep the block open as long as the worker needs it
+        WORKER_ARRAYS[key + ' block'] = block
+
+def compute_shared_tile(rows, cols, p):
+    """Compute a tile of the shared arrays in a worker process."""
+    compute_tile(WORKER_ARRAYS, rows, cols, p)
+
+def similarity_matrices(drafts, p=0.0, tile_size=64, workers=None):
+    """
+    Return the matrices of SequenceMatcher ratios and RBO scores
+    between every pair of drafts
+
+    Tiles of tile_size by tile_size pairs are computed in a pool of
+    worker processes (at most workers at a time; by default, as many as
+    there are CPUs), or in this process if there is only one tile
+    """
+    ids, lengths = encode_drafts(drafts)
+    size = len(lengths)
+    tiles = [(range(i, min(i + tile_size, size)), range(j, min(j + tile_size, size)))
+             for i in range(0, size, tile_size) for j in range(0, size, tile_size)]
+
+    if len(tiles) <= 1 or workers == 1:
+        arrays = {'ids': ids, 'lengths': lengths,
+                  'sequence_matcher': np.zeros((size, size)), 'rbo': np.zeros((size, size))}
+        for rows, cols in tiles:
+            compute_tile(arrays, rows, cols, p)
+        return arrays['sequence_matcher'], arrays['rbo']
+
+    # imported here, since only Python 3.8 or later has it
+    from multiprocessing import shared_memory
+    sources = {'ids': ids, 'lengths': lengths,
+               'sequence_matcher': np.zeros((size, size)), 'rbo': np.zeros((size, size))}
+    blocks, shared = {}, {}
+    try:
+        for key, source in sources.items():
+            blocks[key] = shared_memory.SharedMemory(create=True, size=max(source.nbytes, 1))
+            shared[key] = np.ndarray(source.shape, dtype=source.dtype, buffer=blocks[key].buf)
+            shared[key][...] = source
+        names = {key: block.name for key, block in blocks.items()}
+        shapes = {key: source.shape for key, source in sources.items()}
+        with ProcessPoolExecutor(max_workers=workers, initializer=attach,
+                                 initargs=(names, shapes)) as pool:
+            for future in [pool.submit(compute_shared_tile, rows, cols, p)
+                           for rows, cols in tiles]:
+                future.result()
+        return shared['sequence_matcher'].copy(), shared['rbo'].copy()
+    finally:
+        shared.clear()
+        for block in blocks.values():
+            block.close()
+            block.unlink()
+
+def save_matrices(path, drafts, sequence_matcher, rbo_scores):
+    """
+    Save both matrices to a NumPy .npz file along with a label for each
+    draft (its org name and time of update)
+    """
+    labels = np.array(['{} ({})'.format(draft.org_name, draft.time_of_update)
+                       for draft in drafts])
+    np.savez(path, labels=labels, sequence_matcher=sequence_matcher, rbo=rbo_scores)
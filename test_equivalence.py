@@ -0,0 +1,245 @@
+"""
+Randomized checks that the fast paths give the same results as the
+straightforward implementations they replace
+
+Run with: py -m pytest test_equivalence.py (or py -m unittest)
+"""
+
+from datetime import datetime
+from difflib import SequenceMatcher
+import os
+import random
+import tempfile
+import unittest
+
+import calc_draft_similarities as cds
+import corpus
+import rbo
+import seq_match
+import significance
+import timeline
+
+def random_ranking(rng, pool, length):
+    """Return length distinct names drawn from the first pool names."""
+    return ['player {}'.format(i) for i in rng.sample(range(pool), length)]
+
+class ScoreManyTest(unittest.TestCase):
+    """rbo.score_many() against rbo.score() one candidate at a time"""
+
+    def test_random_rankings(self):
+        rng = random.Random(1)
+        for _ in range(50):
+            pool = rng.randint(1, 90)
+            reference = random_ranking(rng, pool, rng.randint(0, min(pool, 60)))
+            candidates = [random_ranking(rng, pool, rng.randint(0, min(pool, 60)))
+                          for _ in range(rng.randint(1, 20))]
+            p = rng.choice([0.0, 0.5, 0.9, 0.98])
+            expected = [rbo.score(reference, candidate, p) for candidate in candidates]
+            for actual, score in zip(rbo.score_many(reference, candidates, p), expected):
+                self.assertAlmostEqual(actual, score, places=9)
+
+    def test_repeated_names(self):
+        rng = random.Random(2)
+        for _ in range(20):
+            reference = [rng.choice('abcdefgh') for _ in range(rng.randint(1, 12))]
+            candidates = [[rng.choice('abcdefgh') for _ in range(rng.randint(0, 12))]
+                          for _ in range(5)]
+            expected = [rbo.score(reference, candidate) for candidate in candidates]
+            for actual, score in zip(rbo.score_many(reference, candidates), expected):
+                self.assertAlmostEqual(actual, score, places=9)
+
+class BoundsTest(unittest.TestCase):
+    """rbo.bounds() and rbo.top_k() against full scores"""
+
+    def test_bounds_bracket_score(self):
+        rng = random.Random(10)
+        for _ in range(100):
+            pool = rng.randint(1, 90)
+            list_1 = random_ranking(rng, pool, rng.randint(0, min(pool, 60)))
+            list_2 = random_ranking(rng, pool, rng.randint(0, min(pool, 60)))
+            p = rng.choice([0.0, 0.5, 0.9, 0.98])
+            final = rbo.score(list_1, list_2, p)
+            depths = []
+            for depth, rbo_min, rbo_res in rbo.bounds(list_1, list_2, p):
+                depths.append(depth)
+                self.assertLessEqual(rbo_min, final + 1e-9)
+                self.assertGreaterEqual(rbo_min + rbo_res, final - 1e-9)
+            self.assertEqual(depths[-1], max(len(list_1), len(list_2)))
+            self.assertAlmostEqual(rbo_min, final, places=9)
+            self.assertEqual(rbo_res, 0.0)
+
+    def test_top_k_matches_sorted_scores(self):
+        rng = random.Random(11)
+        for _ in range(30):
+            reference = random_ranking(rng, 70, 60)
+            candidates = [random_ranking(rng, 70, rng.choice([14, 30, 60]))
+                          for _ in range(rng.randint(1, 40))]
+            # some candidates tie
+            candidates += rng.sample(candidates, min(3, len(candidates)))
+            k = rng.randint(1, len(candidates) + 2)
+            scores = rbo.score_many(reference, candidates)
+            order = sorted(range(len(candidates)), key=lambda index: (-scores[index], index))
+            top = rbo.top_k(reference, candidates, k)
+            self.assertEqual([index for index, _ in top], order[:k])
+            for index, score in top:
+                self.assertAlmostEqual(score, scores[index], places=9)
+
+class RatioMatcherTest(unittest.TestCase):
+    """seq_match.RatioMatcher against difflib.SequenceMatcher.ratio()"""
+
+    def check(self, a, b):
+        for autojunk in (True, False):
+            expected = SequenceMatcher(None, a, b, autojunk).ratio()
+            self.assertEqual(seq_match.RatioMatcher(b, autojunk).ratio(a), expected)
+
+    def test_distinct_ids(self):
+        rng = random.Random(3)
+        for _ in range(200):
+            pool = rng.randint(1, 90)
+            b = rng.sample(range(pool), rng.randint(0, min(pool, 60)))
+            a = rng.sample(range(pool), rng.randint(0, min(pool, 60)))
+            self.check(a, b)
+
+    def test_repeated_ids(self):
+        rng = random.Random(4)
+        for _ in range(200):
+            b = [rng.randrange(8) for _ in range(rng.randint(0, 30))]
+            a = [rng.randrange(8) for _ in range(rng.randint(0, 30))]
+            self.check(a, b)
+
+    def test_popular_items(self):
+        # autojunk only applies to sequences of 200 or more items
+        rng = random.Random(5)
+        for _ in range(10):
+            b = [rng.randrange(40) for _ in range(rng.randint(200, 400))]
+            a = [rng.randrange(40) for _ in range(rng.randint(0, 300))]
+            self.check(a, b)
+
+def random_date_line(rng):
+    """
+    Return a random date line in a format fast_string_to_datetime()
+    accepts (other than ctime()'s), and the datetime it describes
+    """
+    # two-digit years are read as at most two years from now
+    date_time = datetime(rng.randint(2000, datetime.today().year + 2), rng.randint(1, 12),
+                         rng.randint(1, 28), rng.randrange(24), rng.randrange(60),
+                         rng.randrange(60))
+    month_name = rng.choice([date_time.strftime('%B'), date_time.strftime('%b')])
+    dates = ['{:%Y-%m-%d}'.format(date_time),
+             '{} {}, {}'.format(month_name, date_time.day, date_time.year),
+             '{}/{}/{}'.format(date_time.month, date_time.day,
+                               rng.choice([date_time.year, '{:%y}'.format(date_time)]))]
+    kind = rng.randrange(len(dates))
+    date = dates[kind]
+    hour_12 = date_time.hour % 12 or 12
+    am_pm = rng.choice(['AM', 'am'] if date_time.hour < 12 else ['PM', 'pm'])
+    times = [('', date_time.replace(hour=0, minute=0, second=0)),
+             (' {:%H:%M:%S}'.format(date_time), date_time)]
+    # only the formats other than ISO 8601 take AM or PM
+    if kind:
+        times += [(' {}:{:%M} {}'.format(hour_12, date_time, am_pm),
+                   date_time.replace(second=0)),
+                  (' {}:{:%M:%S} {} EST'.format(hour_12, date_time, am_pm), date_time)]
+    time, date_time = rng.choice(times)
+    return date + time, date_time
+
+class FastDatetimeTest(unittest.TestCase):
+    """fast_string_to_datetime() against the heuristic date parsers"""
+
+    def test_random_lines(self):
+        rng = random.Random(6)
+        for _ in range(500):
+            line, expected = random_date_line(rng)
+            hour, minute, second, date_string = cds.string_to_hms(line)
+            year, month, day = cds.string_to_ymd(date_string, line)
+            heuristic = datetime(year, month, day, hour, minute, second)
+            self.assertEqual(cds.fast_string_to_datetime(line), heuristic, line)
+            self.assertEqual(heuristic, expected, line)
+
+    def test_ctime(self):
+        rng = random.Random(7)
+        for _ in range(100):
+            date_time = datetime(rng.randint(2000, 2030), rng.randint(1, 12),
+                                 rng.randint(1, 28), rng.randrange(24), rng.randrange(60),
+                                 rng.randrange(60))
+            self.assertEqual(cds.fast_string_to_datetime(date_time.ctime() + ' UTC'), date_time)
+
+    def test_impossible_dates(self):
+        for line in ('2019-02-30', '2019-13-01', 'February 29, 2019', '6/31/19',
+                     '2019-06-20 24:00:00', 'the week before the combine'):
+            self.assertIsNone(cds.fast_string_to_datetime(line), line)
+
+class ParallelFormDraftsTest(unittest.TestCase):
+    """parallel_form_drafts() against form_drafts() on the same file"""
+
+    def test_random_files(self):
+        rng = random.Random(8)
+        for newline in ('\n', '\r\n'):
+            drafts = []
+            for index in range(rng.randint(20, 40)):
+                lines = ['NBA' if index == 0 else 'Org {}'.format(rng.randrange(10)),
+                         random_date_line(rng)[0]]
+                lines += ['Player {}. {}'.format(rng.randrange(100), rng.choice('ABC'))
+                          for _ in range(rng.randint(1, 30))]
+                drafts.append(newline.join(lines))
+            # with or without a blank line after the last draft
+            text = (newline * 2).join(drafts) + rng.choice(['', newline, newline * 2])
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'drafts')
+                with open(path, 'w', encoding='utf-8', newline='') as f:
+                    f.write(text)
+                expected = [(d.org_name, d.time_of_update, list(d.player_list))
+                            for d in cds.form_drafts([path])]
+                for chunk_size in (1, 100, 1000, 1 << 20):
+                    actual = [(d.org_name, d.time_of_update, list(d.player_list))
+                              for d in cds.parallel_form_drafts(path, 2, chunk_size)]
+                    self.assertEqual(actual, expected)
+
+class DriftScoresTest(unittest.TestCase):
+    """timeline.drift_scores() against scoring each pair of versions alone"""
+
+    def test_random_revisions(self):
+        rng = random.Random(9)
+        pairs = []
+        for _ in range(300):
+            previous = random_ranking(rng, 80, rng.randint(0, 60))
+            # revise some of the picks after a random point
+            current = previous[:rng.randint(0, len(previous))]
+            current += random_ranking(rng, 80, rng.randint(0, 20))
+            if rng.random() < 0.2:
+                previous = previous + previous[:2]
+            pairs.append((previous, rng.choice([current, list(previous)])))
+        for (previous, current), (ratio, score) in zip(pairs, timeline.drift_scores(pairs)):
+            self.assertEqual(ratio, SequenceMatcher(None, current, previous).ratio())
+            self.assertAlmostEqual(score, rbo.score(previous, current), places=9)
+
+class ResampleTest(unittest.TestCase):
+    """significance.resample() with the 'window' kind"""
+
+    def test_picks_stay_within_window(self):
+        names = ['player {}'.format(i) for i in range(60)]
+        pick_of = {name: pick for pick, name in enumerate(names)}
+        for window in (0, 1, 3, 5):
+            for ranking in significance.resample(names, 60, 500, 'window', window, seed=window):
+                self.assertEqual(sorted(ranking), sorted(names))
+                for pick, name in enumerate(ranking):
+                    self.assertLessEqual(abs(pick_of[name] - pick), window)
+
+class CorpusTest(unittest.TestCase):
+    """Drafts compiled into a corpus against the text files they came from"""
+
+    def test_several_files(self):
+        files = [os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+                 for name in ('2019_NBA_drafts', '2018_NBA_drafts')]
+        expected = [(d.org_name, d.time_of_update, list(d.player_list))
+                    for d in cds.load_drafts(files)]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'drafts.corpus')
+            corpus.compile_files(files, path)
+            drafts = list(cds.load_drafts([path]))
+            actual = [(d.org_name, d.time_of_update, list(d.player_list)) for d in drafts]
+        self.assertEqual(actual, expected)
+        self.assertEqual(sum(1 for draft in drafts if draft.is_official()), len(files))
+
+if __name__ == "__main__":
+    unittest.main()
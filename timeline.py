@@ -0,0 +1,124 @@
+"""
+Follow each org's mock drafts over time
+
+Each org's history is its mocks in order of time of update (mocks
+posted at the same time keep the order they were read in). For every
+version, the history has its accuracy against the actual draft and its
+drift from the previous version (how similar the two are by
+SequenceMatcher and RBO).
+
+Outlets post many versions that only change a few picks, so scoring is
+batched and reuses what consecutive versions have in common:
+ - accuracy is scored for every version of every org at once through
+   metrics, and a version with the same picks as an earlier one is only
+   scored once
+ - drift between every pair of consecutive versions is found from one
+   matrix of where each pick of a version was in the previous one, in
+   which the prefix the two have in common is filled in as matching
+   rather than looked up: the RBO scores of all pairs are computed at
+   once from it, and each SequenceMatcher ratio is a single pass over
+   its row
+ - a version whose picks are unchanged isn't compared at all
+"""
+
+from collections import defaultdict
+
+import numpy as np
+
+import metrics
+import rbo
+import seq_match
+
+# measures of accuracy against the actual draft
+ACCURACY_MEASURES = ('SequenceMatcher', 'RBO score')
+
+def histories(mocks):
+    """
+    Return a dict whose key is an org name and whose value is a list of
+    its mocks ordered by time of update
+    """
+    by_org = defaultdict(list)
+    # sorting is stable, so mocks made at the same time stay in order
+    for mock in sorted(mocks, key=lambda mock: (mock.org_name, mock.time_of_update)):
+        by_org[mock.org_name].append(mock)
+    return dict(by_org)
+
+def common_prefix(names_1, names_2):
+    """Return the number of leading names that two lists have in common."""
+    length = 0
+    for name_1, name_2 in zip(names_1, names_2):
+        if name_1 != name_2:
+            break
+        length += 1
+    return length
+
+def drift_scores(pairs):
+    """
+    Given a list of (previous, current) lists of names (or player IDs),
+    return a list of tuples of how similar each current version is to
+    the previous one, by SequenceMatcher ratio and by RBO score (the
+    same as SequenceMatcher(None, current, previous).ratio() and
+    rbo.score(previous, current))
+    """
+    results = [(1.0, 1.0) if previous and previous == current else None
+               for previous, current in pairs]
+    # pairs that are scored from the matrix of ranks, which needs each
+    # name in the previous version to have one rank
+    batched = [k for k, (previous, _) in enumerate(pairs)
+               if results[k] is None and len(set(previous)) == len(previous)]
+    width = max((max(len(pairs[k][0]), len(pairs[k][1])) for k in batched), default=0)
+    ranks = np.full((len(batched), width), -1, dtype=np.intp)
+    lengths = np.zeros(len(batched), dtype=np.intp)
+    ref_lengths = np.zeros(len(batched), dtype=np.intp)
+    for row, k in enumerate(batched):
+        previous, current = pairs[k]
+        prefix = common_prefix(previous, current)
+        # each name in the common prefix is at its own rank in previous
+        ranks[row, :prefix] = np.arange(prefix)
+        rank_of = {name: rank for rank, name in enumerate(previous)}
+        ranks[row, prefix:len(current)] = [rank_of.get(name, -1) for name in current[prefix:]]
+        lengths[row], ref_lengths[row] = len(current), len(previous)
+    rbo_scores = rbo.score_overlaps(rbo.overlap_table(ranks), lengths, ref_lengths).tolist()
+    for row, k in enumerate(batched):
+        ratio = seq_match.position_ratio(ranks[row, :lengths[row]].tolist(), ref_lengths[row])
+        results[k] = ratio, rbo_scores[row]
+
+    for k, (previous, current) in enumerate(pairs):
+        if results[k] is None:
+            results[k] = seq_match.ratio(current, previous), rbo.score(previous, current)
+    return results
+
+def timelines(actual, mocks, accuracy=None):
+    """
+    Return a dict whose key is an org name and whose value is a list of
+    (mock, {measure: accuracy}, drift) for each version, where drift is
+    None for the first version
+
+    accuracy can be given as a dict whose key is the name of a measure
+    in ACCURACY_MEASURES and whose value is a dict of each mock's score;
+    otherwise each distinct list of picks is scored once
+    """
+    if accuracy is None:
+        distinct = {}
+        for mock in mocks:
+            distinct.setdefault(tuple(mock.player_list), len(distinct))
+        scores = metrics.score_all(actual.player_list, list(distinct), ACCURACY_MEASURES)
+        accuracy = {name: {mock: scores[name][distinct[tuple(mock.player_list)]]
+                           for mock in mocks}
+                    for name in ACCURACY_MEASURES}
+
+    by_org = histories(mocks)
+    pairs = []
+    for versions in by_org.values():
+        # player IDs come from one registry, so they compare like names
+        player_ids = [list(mock.player_ids) for mock in versions]
+        pairs += zip(player_ids, player_ids[1:])
+    drifts = iter(drift_scores(pairs))
+
+    results = {}
+    for org_name, versions in by_org.items():
+        results[org_name] = [
+            (mock, {name: accuracy[name][mock] for name in ACCURACY_MEASURES},
+             next(drifts) if index else None)
+            for index, mock in enumerate(versions)]
+    return results